@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# the grandparent directory is added to sys.path of every probe, the same way main.py does for the game package.
+currentDir = os.path.dirname(os.path.abspath(__file__))
+packageDir = os.path.dirname(os.path.dirname(currentDir))
+
+# measures how long a fresh interpreter takes to import the core packages, and guards what they
+# pull in: the core must import without Qt, and numpy is only imported once a GameState is built.
+# run from anywhere:
+#   python game/benchmarks/importBenchmark.py
+# the exit status is 1 when a forbidden module was imported or an import went over its budget.
+
+coreModules = [
+    'game.util.enums',
+    'game.database.gameDatabase',
+    'game.core.gameState',
+    'game.core.saveManager',
+    'game.core.timeline',
+    'game.core.headlessRunner',
+    'game.core.parameterSweep',
+    'game.core.simulationWorker'
+]
+
+# modules the core must not import. numpy is only allowed once a ledger is built.
+forbiddenModules = ['PyQt6', 'numpy']
+
+# each import runs in a new interpreter, which reports the import time and the forbidden modules
+# that were loaded
+probeSource = '''
+import json, sys, time
+sys.path.insert(0, {packageDir!r})
+startTime = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - startTime
+loaded = [name for name in {forbidden!r} if name in sys.modules]
+print(json.dumps({{'seconds': elapsed, 'loaded': loaded}}))
+'''
+
+def probe(module : str) -> dict:
+    source = probeSource.format(packageDir=packageDir, module=module, forbidden=forbiddenModules)
+    output = subprocess.run([sys.executable, '-c', source], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def slowestImports(module : str, count : int) -> list:
+    # (name, cumulative microseconds) of the slowest imports below module, from -X importtime
+    source = f'import sys; sys.path.insert(0, {packageDir!r}); import {module}'
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', source], capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        selfTime, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(cumulative)))
+    return sorted(rows, key=lambda r: r[1], reverse=True)[1:count + 1]
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Benchmark and guard the imports of the Helium Hustle core.')
+    parser.add_argument('--repeats', type=int, default=5, help='interpreters started per module, the fastest one is kept')
+    parser.add_argument('--budget', type=float, default=50.0, help='milliseconds a core module may take to import')
+    parser.add_argument('--details', action='store_true', help='list the slowest imports below each module')
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parseArguments()
+    failures = []
+    for module in coreModules:
+        results = [probe(module) for i in range(0, args.repeats)]
+        milliseconds = min(r['seconds'] for r in results) * 1000
+        loaded = results[0]['loaded']
+        print(f'{module:32} {milliseconds:8.1f} ms' + (f'  imports {", ".join(loaded)}' if loaded else ''))
+        if loaded:
+            failures.append(f'{module} imports {", ".join(loaded)}')
+        if milliseconds > args.budget:
+            failures.append(f'{module} takes {milliseconds:.1f} ms, over the {args.budget:.0f} ms budget')
+        if args.details:
+            for name, microseconds in slowestImports(module, 5):
+                print(f'    {name:28} {microseconds / 1000:8.1f} ms')
+
+    if len(failures) > 0:
+        print(f'{len(failures)} import problems:')
+        for line in failures:
+            print(f'  {line}')
+        sys.exit(1)
+    print('core imports are Qt-free and within budget')
@@ -0,0 +1,81 @@
+import contextlib
+import io
+import os
+import sys
+import timeit
+import tracemalloc
+
+# Add the grandparent directory to sys.path, the same way main.py does for the game package.
+currentDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(os.path.dirname(currentDir)))
+
+from game.database.gameDatabase import GameDatabase
+from game.core.gameState import GameState
+
+# measures the memory held by each GameState and the cost of reading and writing the attributes
+# of the *State objects that the tick loop touches. run from anywhere:
+#   python game/benchmarks/stateBenchmark.py
+
+instanceCount = 200
+accessRepeats = 1000000
+
+def objectSize(obj) -> int:
+    # size of the object itself plus its attribute dict, if it has one
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+def measureFootprint(database : GameDatabase):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    # GameState construction logs triggered events, which is not interesting here
+    with contextlib.redirect_stdout(io.StringIO()):
+        states = [GameState(database) for i in range(0, instanceCount)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f'GameState footprint: {(after - before) / instanceCount / 1024:.1f} KiB per instance ({instanceCount} instances)')
+
+    state = states[0]
+    collections = [
+        ('CommandState', state.commands.values()),
+        ('BuildingState', state.buildings.values()),
+        ('ResourceState', state.resources.values()),
+        ('EventState', state.events.values()),
+        ('ResearchState', state.research.values()),
+        ('ProjectState', state.projects.values()),
+        ('IdeologyState', state.ideologies.values()),
+        ('AdversaryState', state.adversaries.values()),
+        ('DefenderState', state.defenders.values())
+    ]
+    total = 0
+    for name, objects in collections:
+        objects = list(objects)
+        size = sum(objectSize(o) for o in objects)
+        total += size
+        print(f'  {name:16} {len(objects):4} objects {size:8} bytes')
+    print(f'  {"total":16} {total:18} bytes')
+
+def measureAccess(database : GameDatabase):
+    with contextlib.redirect_stdout(io.StringIO()):
+        state = GameState(database)
+    cases = [
+        ('AdversaryState.strength read', 'aState.strength', 'aState = state.adversaries[next(iter(state.adversaries))]'),
+        ('AdversaryState.strength write', 'aState.strength = 1.0', 'aState = state.adversaries[next(iter(state.adversaries))]'),
+        ('IdeologyState.totalScore read', 'iState.totalScore', 'iState = next(iter(state.ideologies.values()))'),
+        ('ProjectState.progress write', 'pState.progress = 1.0', 'pState = next(iter(state.projects.values()))'),
+        ('EventState.triggered read', 'eState.triggered', 'eState = next(iter(state.events.values()))'),
+        ('ResourceState.count read', 'rState.count', 'rState = state.resources["Credits"]'),
+        ('ledger.count[index] read', 'count[rIndex]', 'count = state.ledger.count; rIndex = state.resources["Credits"].index'),
+        ('BuildingState.totalCount read', 'bState.totalCount', 'bState = state.buildings["Solar Panels"]'),
+    ]
+    for name, statement, setup in cases:
+        seconds = min(timeit.repeat(statement, setup, number=accessRepeats, repeat=5, globals={'state': state}))
+        print(f'  {name:32} {seconds / accessRepeats * 1e9:6.1f} ns')
+
+if __name__ == '__main__':
+    os.chdir(os.path.dirname(currentDir))
+    database = GameDatabase('database/gameData')
+    measureFootprint(database)
+    print('attribute access:')
+    measureAccess(database)
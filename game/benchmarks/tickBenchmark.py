@@ -0,0 +1,326 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+# Add the grandparent directory to sys.path, the same way main.py does for the game package.
+currentDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(os.path.dirname(currentDir)))
+
+from game.database.gameDatabase import GameDatabase
+from game.core.gameState import GameState
+from game.core.resourceLedger import ResourceLedger
+from game.core.modifierManager import ModifierManager
+from game.core.eventManager import EventManager
+
+# measures the tick loop on a set of scenarios, from a fresh start to a late game, and compares the
+# results against a saved baseline. needs no display and no Qt. run from anywhere:
+#   python game/benchmarks/tickBenchmark.py --save baseline.json
+#   python game/benchmarks/tickBenchmark.py --compare baseline.json
+# for every scenario it reports ticks per second for GameState.step and for a bulk advance, the
+# time per GameProgram.step call, the time per tick spent in each phase of the tick, and the memory
+# allocated per tick, each timing the best of --repeats runs. the exit status is 1 when a result
+# regressed against the compared baseline.
+
+# the phases of GameState.advance, timed by wrapping the methods on their classes while a scenario
+# runs. the wrappers add a little time to every phase.
+tickPhases = [
+    ('production', GameState, 'updateIncomeAndBuildingProduction'),
+    ('programs', GameState, 'runAllPrograms'),
+    ('projects', GameState, 'updateProjectPayments'),
+    ('armies', GameState, 'updateArmies'),
+    ('clamp', ResourceLedger, 'clampToStorage'),
+    ('ranks', ModifierManager, 'updateIdeologyRank'),
+    ('modifiers', GameState, 'updateModifiers'),
+    ('events', EventManager, 'step')
+]
+
+# phases faster than this many microseconds per tick are too noisy to flag
+phaseNoiseMicroseconds = 0.5
+# allocation growth below this many bytes per tick is not flagged
+allocationNoiseBytes = 16
+
+def fillResources(state : GameState, fraction : float):
+    state.updateStorageAndProcessors()
+    for rState in state.resources.values():
+        rState.count = rState.storage * fraction
+
+def setBuildings(state : GameState, count : int):
+    for bState in state.buildings.values():
+        bState.unlocked = True
+        bState.totalCount = count
+        state.changeActiveCount(bState, count)
+    state.dirty.storage = True
+
+def loadPrograms(state : GameState, programCount : int, commandNames : list):
+    # every program runs the commands in a loop, with up to three runs of each
+    for programIndex in range(0, programCount):
+        for commandIndex, cName in enumerate(commandNames):
+            state.addCommandToProgram(programIndex, cName)
+            state.changeCommandMaxCount(programIndex, commandIndex, (programIndex + commandIndex) % 3)
+    state.updateStorageAndProcessors()
+    processorsPerProgram = int(state.resources['Processors'].storage) // programCount
+    for program in state.programs:
+        program.assignedProcessors = 0
+    # setAssignedProcessors only hands out free processors, so they are counted again first
+    state.updateProcessorAllocation()
+    for programIndex in range(0, programCount):
+        state.setAssignedProcessors(programIndex, processorsPerProgram)
+
+def freshScenario(database : GameDatabase) -> GameState:
+    # a new game with nothing running
+    return GameState(database)
+
+def earlyScenario(database : GameDatabase) -> GameState:
+    # the opening: a handful of buildings and one program on one processor
+    state = GameState(database)
+    for bName, count in [('Solar Panels', 4), ('Regolith Harvester', 2), ('Data Center', 2)]:
+        bState = state.buildings[bName]
+        bState.unlocked = True
+        bState.totalCount = count
+        state.changeActiveCount(bState, count)
+    loadPrograms(state, 1, ['Sell Cloud Compute', 'Gather Regolith', 'Idle'])
+    fillResources(state, 0.5)
+    return state
+
+def lateScenario(database : GameDatabase) -> GameState:
+    # thousands of buildings, all research, every program loaded with every command, all
+    # adversaries and defenders fighting and every project being paid into
+    state = GameState(database)
+    for cName in state.commands.keys():
+        state.unlock(cName)
+    for rName in state.resources.keys():
+        state.unlock(rName)
+    for rName, rState in state.research.items():
+        rState.unlocked = True
+        rState.purchased = True
+        state.purchasedResearch.add(rName)
+    state.updateModifiers()
+    setBuildings(state, 500)
+    loadPrograms(state, database.params.maxProgramCount, list(state.commands.keys()))
+    for aState in state.adversaries.values():
+        aState.unlocked = True
+        aState.strength = 1000.0
+        aState.spawnRate = 1.0
+    for dState in state.defenders.values():
+        dState.unlocked = True
+    fillResources(state, 0.5)
+    for pState in state.projects.values():
+        for rName in pState.resourcePayments.keys():
+            pState.resourcePayments[rName] = 1.0
+    return state
+
+scenarios = [
+    ('fresh', freshScenario),
+    ('early', earlyScenario),
+    ('late', lateScenario)
+]
+
+def bestSeconds(fixture : GameState, run, repeats : int) -> float:
+    # best of repeats runs, each on a new clone of the fixture
+    best = None
+    for i in range(0, repeats):
+        state = fixture.clone()
+        startTime = time.perf_counter()
+        run(state)
+        elapsed = time.perf_counter() - startTime
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def stepTicks(state : GameState, tickCount : int):
+    for i in range(0, tickCount):
+        state.step()
+
+def stepPrograms(state : GameState, callCount : int) -> int:
+    programs = [p for p in state.programs if p.assignedProcessors > 0 and len(p.commands) > 0]
+    for i in range(0, callCount):
+        for program in programs:
+            program.step()
+    return callCount * len(programs)
+
+def measurePhases(fixture : GameState, tickCount : int) -> dict:
+    # microseconds per tick in each phase of advance, and in everything else
+    totals = {phase: 0 for phase, cls, name in tickPhases}
+    originals = []
+
+    def timed(function, phase):
+        def wrapper(*args, **kwargs):
+            startTime = time.perf_counter_ns()
+            result = function(*args, **kwargs)
+            totals[phase] += time.perf_counter_ns() - startTime
+            return result
+        return wrapper
+
+    state = fixture.clone()
+    for phase, cls, name in tickPhases:
+        original = cls.__dict__[name]
+        originals.append((cls, name, original))
+        function = original.__func__ if isinstance(original, staticmethod) else original
+        wrapper = timed(function, phase)
+        setattr(cls, name, staticmethod(wrapper) if isinstance(original, staticmethod) else wrapper)
+    try:
+        startTime = time.perf_counter_ns()
+        state.advance(tickCount)
+        total = time.perf_counter_ns() - startTime
+    finally:
+        for cls, name, original in originals:
+            setattr(cls, name, original)
+
+    result = {phase: nanoseconds / tickCount / 1000 for phase, nanoseconds in totals.items()}
+    result['other'] = max(0, total - sum(totals.values())) / tickCount / 1000
+    return result
+
+def measureAllocations(fixture : GameState, tickCount : int) -> dict:
+    # bytes still allocated per tick after the run, and the peak above the starting point. gen0
+    # collections count container allocations that outlive a collection threshold.
+    state = fixture.clone()
+    gc.collect()
+    collections = gc.get_stats()[0]['collections']
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    state.advance(tickCount)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'bytesPerTick': (after - before) / tickCount,
+        'peakBytes': peak - before,
+        'gen0CollectionsPer1000Ticks': (gc.get_stats()[0]['collections'] - collections) * 1000 / tickCount
+    }
+
+def bestPhases(fixture : GameState, tickCount : int, repeats : int) -> dict:
+    # the fastest of repeats runs for each phase
+    best = measurePhases(fixture, tickCount)
+    for i in range(1, repeats):
+        for phase, value in measurePhases(fixture, tickCount).items():
+            best[phase] = min(best[phase], value)
+    return best
+
+def runScenario(fixture : GameState, tickCount : int, repeats : int) -> dict:
+    stepSeconds = bestSeconds(fixture, lambda state: stepTicks(state, tickCount), repeats)
+    advanceSeconds = bestSeconds(fixture, lambda state: state.advance(tickCount), repeats)
+
+    programCalls = stepPrograms(fixture.clone(), 1)
+    programSeconds = bestSeconds(fixture, lambda state: stepPrograms(state, tickCount), repeats)
+
+    return {
+        'stepTicksPerSecond': tickCount / stepSeconds,
+        'advanceTicksPerSecond': tickCount / advanceSeconds,
+        'programStepMicroseconds': programSeconds / (programCalls * tickCount) * 1e6 if programCalls > 0 else None,
+        'phaseMicrosecondsPerTick': bestPhases(fixture, tickCount, repeats),
+        **measureAllocations(fixture, tickCount)
+    }
+
+def mergeBest(result : dict, other : dict) -> dict:
+    # the better of two measurements of the same scenario for every timing. noise only ever makes a
+    # run slower, so this is the same as keeping the best of the repeats of both.
+    merged = dict(result)
+    merged['stepTicksPerSecond'] = max(result['stepTicksPerSecond'], other['stepTicksPerSecond'])
+    merged['advanceTicksPerSecond'] = max(result['advanceTicksPerSecond'], other['advanceTicksPerSecond'])
+    if result['programStepMicroseconds'] is not None:
+        merged['programStepMicroseconds'] = min(result['programStepMicroseconds'], other['programStepMicroseconds'])
+    merged['phaseMicrosecondsPerTick'] = {phase: min(value, other['phaseMicrosecondsPerTick'][phase])
+        for phase, value in result['phaseMicrosecondsPerTick'].items()}
+    return merged
+
+def findRegressions(results : dict, baseline : dict, threshold : float) -> list:
+    # lines describing every result that is more than threshold worse than the baseline
+    regressions = []
+
+    def check(name : str, value : float, previous : float, higherIsBetter : bool, noise : float = 0.0):
+        if value is None or previous is None:
+            return
+        if higherIsBetter:
+            if value < previous * (1.0 - threshold):
+                regressions.append(f'{name}: {value:,.1f} vs {previous:,.1f}')
+        elif value > previous * (1.0 + threshold) and value - previous > noise:
+            regressions.append(f'{name}: {value:,.2f} vs {previous:,.2f}')
+
+    for sName, result in results['scenarios'].items():
+        previous = baseline['scenarios'].get(sName)
+        if previous is None:
+            continue
+        check(f'{sName} step ticks/s', result['stepTicksPerSecond'], previous['stepTicksPerSecond'], True)
+        check(f'{sName} advance ticks/s', result['advanceTicksPerSecond'], previous['advanceTicksPerSecond'], True)
+        check(f'{sName} GameProgram.step us', result['programStepMicroseconds'], previous['programStepMicroseconds'], False)
+        for phase, value in result['phaseMicrosecondsPerTick'].items():
+            check(f'{sName} {phase} us/tick', value, previous['phaseMicrosecondsPerTick'].get(phase), False, phaseNoiseMicroseconds)
+        check(f'{sName} bytes/tick', result['bytesPerTick'], previous['bytesPerTick'], False, allocationNoiseBytes)
+    return regressions
+
+def printResults(results : dict):
+    for sName, result in results['scenarios'].items():
+        print(f'{sName}:')
+        print(f'  GameState.step     {result["stepTicksPerSecond"]:12,.0f} ticks/s')
+        print(f'  GameState.advance  {result["advanceTicksPerSecond"]:12,.0f} ticks/s')
+        if result['programStepMicroseconds'] is not None:
+            print(f'  GameProgram.step   {result["programStepMicroseconds"]:12.2f} us/call')
+        for phase, value in result['phaseMicrosecondsPerTick'].items():
+            print(f'    {phase:16} {value:12.2f} us/tick')
+        print(f'  allocations        {result["bytesPerTick"]:12.1f} bytes/tick retained, {result["peakBytes"] / 1024:.1f} KiB peak, '
+              f'{result["gen0CollectionsPer1000Ticks"]:.1f} gen0 collections per 1000 ticks')
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Benchmark the Helium Hustle tick loop.')
+    parser.add_argument('--ticks', type=int, default=10000, help='ticks per measured run')
+    parser.add_argument('--repeats', type=int, default=5, help='runs per measurement, the best one is kept')
+    parser.add_argument('--scenario', action='append', choices=[name for name, build in scenarios], help='scenarios to run, all by default')
+    parser.add_argument('--save', help='write the results to this json baseline')
+    parser.add_argument('--compare', help='flag regressions against this json baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown that counts as a regression')
+    parser.add_argument('--retries', type=int, default=3, help='times a scenario that regressed is measured again before it is reported')
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parseArguments()
+    os.chdir(os.path.dirname(currentDir))
+    database = GameDatabase('database/gameData')
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'ticks': args.ticks,
+        'scenarios': {}
+    }
+    for sName, build in scenarios:
+        if args.scenario and not sName in args.scenario:
+            continue
+        # the game prints as events trigger
+        with contextlib.redirect_stdout(io.StringIO()):
+            results['scenarios'][sName] = runScenario(build(database), args.ticks, args.repeats)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+        # a busy machine slows down every run of a measurement at times, so a scenario that looks
+        # regressed is measured again and the best timings of all its measurements are compared
+        for retry in range(0, args.retries):
+            regressed = [sName for sName, result in results['scenarios'].items()
+                if len(findRegressions({'scenarios': {sName: result}}, baseline, args.threshold)) > 0]
+            if len(regressed) == 0:
+                break
+            for sName, build in scenarios:
+                if sName in regressed:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        result = runScenario(build(database), args.ticks, args.repeats)
+                    results['scenarios'][sName] = mergeBest(results['scenarios'][sName], result)
+    printResults(results)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if baseline is not None:
+        regressions = findRegressions(results, baseline, args.threshold)
+        if len(regressions) > 0:
+            print(f'{len(regressions)} regressions against {args.compare}:')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print(f'no regressions against {args.compare}')
@@ -0,0 +1,84 @@
+
+from __future__ import annotations
+
+from typing import List, NamedTuple
+
+from game.core.gameSnapshot import GameSnapshot
+
+class GameAction(NamedTuple):
+    tick: int # state.ticks when the action was applied
+    name: str # one of ActionQueue.actionNames
+    args: tuple # plain values only (names, indices and numbers), so actions can be written to a file
+
+class ActionJournal:
+    # every action applied to a state since the journal was started, together with a snapshot of
+    # the state at that point. replaying the actions on the snapshot reproduces the session.
+    def __init__(self, start : GameSnapshot):
+        self.start: GameSnapshot = start
+        self.actions: List[GameAction] = []
+
+    def replay(self, state : GameState, endTick : int = None, fast : bool = False) -> GameState:
+        # restores the start snapshot into state and re-runs the session on it
+        state.restore(self.start)
+        return self.play(state, 0, endTick, fast)
+
+    def play(self, state : GameState, firstAction : int, endTick : int = None, fast : bool = False) -> GameState:
+        # runs the actions from index firstAction on, with bulk advance between them. fast uses
+        # fastForward, which matches advance up to float rounding. stops at endTick if given,
+        # including the actions applied on that tick, otherwise after the last action.
+        advance = state.fastForward if fast else state.advance
+        for action in self.actions[firstAction:]:
+            if endTick is not None and action.tick > endTick:
+                break
+            advance(action.tick - state.ticks)
+            ActionQueue.apply(state, action.name, action.args)
+        if endTick is not None:
+            advance(endTick - state.ticks)
+        return state
+
+class ActionQueue:
+    # player actions are queued and applied at tick boundaries, and journaled when a journal was
+    # started. every action is a GameState method called with the action's args.
+    actionNames = frozenset([
+        'runCommand',
+        'attemptPurchaseBuilding',
+        'attemptPurchaseResearch',
+        'modifyProjectPayment',
+        'modifyBuildingActive',
+        'removeBuilding',
+        'setAssignedProcessors',
+        'restartAllPrograms',
+        'addCommandToProgram',
+        'reorderProgram',
+        'changeCommandMaxCount',
+        'chooseEventOption',
+        'markEventDisplayed',
+        'restoreProject'
+    ])
+
+    def __init__(self, state : GameState):
+        self.state = state
+        self.pending: List[GameAction] = []
+        self.journal: ActionJournal = None
+
+    def startJournal(self) -> ActionJournal:
+        self.journal = ActionJournal(self.state.snapshot())
+        return self.journal
+
+    def submit(self, name : str, *args):
+        if not name in ActionQueue.actionNames:
+            raise ValueError(f"Unknown action {name}")
+        self.pending.append(GameAction(0, name, args))
+
+    def applyPending(self):
+        pending = self.pending
+        self.pending = []
+        for action in pending:
+            action = GameAction(self.state.ticks, action.name, action.args)
+            if self.journal is not None:
+                self.journal.actions.append(action)
+            ActionQueue.apply(self.state, action.name, action.args)
+
+    @staticmethod
+    def apply(state : GameState, name : str, args : tuple):
+        getattr(state, name)(*args)
@@ -0,0 +1,59 @@
+
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Dict, Tuple
+
+from game.database.gameDatabase import ResourceList
+from game.core.modifierManager import ModifierManager
+
+class CostCache:
+    # costs only depend on how many times something was bought and on which research is
+    # purchased. each entry remembers the purchase count it was computed for, and purchasing
+    # research clears everything. cached ResourceLists are shared, so their dicts are read-only.
+    def __init__(self, state : GameState):
+        self.state = state
+        self.buildingCosts: Dict[str, Tuple[int, ResourceList]] = {}
+        self.projectCosts: Dict[str, Tuple[int, float]] = {}
+        self.researchCosts: Dict[str, ResourceList] = {}
+        self.commandCosts: Dict[str, ResourceList] = {}
+
+    def invalidate(self):
+        self.buildingCosts.clear()
+        self.projectCosts.clear()
+        self.researchCosts.clear()
+        self.commandCosts.clear()
+
+    @staticmethod
+    def freeze(resourceList : ResourceList) -> ResourceList:
+        return ResourceList(MappingProxyType(resourceList.r))
+
+    def getBuildingCost(self, buildingName : str) -> ResourceList:
+        totalCount = self.state.buildings[buildingName].totalCount
+        entry = self.buildingCosts.get(buildingName)
+        if entry is None or entry[0] != totalCount:
+            entry = (totalCount, self.freeze(ModifierManager.getBuildingCost(self.state, buildingName)))
+            self.buildingCosts[buildingName] = entry
+        return entry[1]
+
+    def getProjectCost(self, projectName : str) -> float:
+        purchaseCount = self.state.projects[projectName].purchaseCount
+        entry = self.projectCosts.get(projectName)
+        if entry is None or entry[0] != purchaseCount:
+            entry = (purchaseCount, ModifierManager.getProjectCost(self.state, projectName))
+            self.projectCosts[projectName] = entry
+        return entry[1]
+
+    def getResearchCost(self, researchName : str) -> ResourceList:
+        cost = self.researchCosts.get(researchName)
+        if cost is None:
+            cost = self.freeze(ModifierManager.getResearchCost(self.state, researchName))
+            self.researchCosts[researchName] = cost
+        return cost
+
+    def getCommandCost(self, commandName : str) -> ResourceList:
+        cost = self.commandCosts.get(commandName)
+        if cost is None:
+            cost = self.freeze(ModifierManager.getCommandCost(self.state, commandName))
+            self.commandCosts[commandName] = cost
+        return cost
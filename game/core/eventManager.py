@@ -1,45 +1,68 @@
-
 from __future__ import annotations
 
+import heapq
 from datetime import datetime
-
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton
-from PyQt6.QtCore import Qt
+from typing import Dict, List, Tuple
 
 from game.database.gameDatabase import EventInfo
 
 class EventManager():
+    # events wait in a min-heap keyed on ticksRequired, so a tick only looks at the heap top. an
+    # event triggers on the tick counter alone; resourcesRequired and buildingsRequired are not
+    # checked.
     def __init__(self, state : GameState):
         self.state = state
-        self.events = []
-        
+        self.eventOrder: Dict[str, int] = {}
+        for i, eName in enumerate(state.events.keys()):
+            self.eventOrder[eName] = i
+        self.rebuild()
+
+    def rebuild(self):
+        # rebuilds the schedule from the event states, e.g. after the state was loaded
+        self.schedule: List[Tuple[int, int, EventState]] = []
+        for eState in self.state.events.values():
+            if not eState.triggered:
+                self.schedule.append((eState.info.ticksRequired, self.eventOrder[eState.info.name], eState))
+        heapq.heapify(self.schedule)
+
     def eventShouldTrigger(self, eState : EventState) -> bool:
         eInfo : EventInfo = eState.info
         if self.state.ticks < eInfo.ticksRequired:
             return False
         return True
-        
+
     def triggerEvent(self, eState : EventState):
         eInfo: EventInfo = eState.info
         print('triggering event: ' + eInfo.name)
         eState.triggered = True
         eState.timestampStr = datetime.now().strftime("%I:%M %p").lstrip("0")
-        
+
         if len(eInfo.income) > 0:
             eState.ongoing = True
             self.state.ongoingEvents.insert(0, eState)
         else:
             self.state.activeEvents.insert(0, eState)
-            
+
         self.state.dirty.events = True
-        
+
+    def ticksUntilNextEvent(self) -> int:
+        # ticks until the next scheduled event is due, or None if nothing is scheduled
+        if len(self.schedule) == 0:
+            return None
+        return max(0, self.schedule[0][0] - self.state.ticks)
+
     def step(self):
-        for eState in self.state.events.values():
-            #print(eState)
-            #print(dir(eState))
-            if eState.triggered:
-                continue
-            if self.eventShouldTrigger(eState):
-                self.triggerEvent(eState)
-                continue
+        ticks = self.state.ticks
+        schedule = self.schedule
+        if len(schedule) == 0 or schedule[0][0] > ticks:
+            return
+        due: List[Tuple[int, EventState]] = []
+        while len(schedule) > 0 and schedule[0][0] <= ticks:
+            ticksRequired, order, eState = heapq.heappop(schedule)
+            if not eState.triggered:
+                due.append((order, eState))
 
+        # events that are due on the same tick trigger in database order
+        due.sort(key=lambda x: x[0])
+        for order, eState in due:
+            self.triggerEvent(eState)
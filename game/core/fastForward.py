@@ -0,0 +1,511 @@
+
+from __future__ import annotations
+
+import math
+from typing import Dict, List
+
+from game.core.modifierManager import ModifierManager
+
+class FastForward:
+    # Jumps over stretches of steady-state play in closed form. While nothing discrete happens,
+    # every resource changes by the same amount each tick (building production and upkeep, ongoing
+    # event income and project payments) and armies follow a fixed recurrence. The engine computes
+    # how many ticks it can skip before the next discrete change, integrates those ticks directly,
+    # and falls back to GameState.advance() for the ticks around the discontinuity.
+    #
+    # Discrete changes are: a resource reaching its storage cap, a resource too low to cover its
+    # upkeep or project payments, an event becoming due, a project completing, an army surge and a
+    # defender fight.
+    #
+    # Results match GameState.advance() up to floating-point rounding, since k additions of the same
+    # rate are replaced by one multiplication.
+    #
+    # When a resource cannot cover its demand, buildings run partially (a brownout) and the per-tick
+    # change is no longer constant, but it usually settles into a short cycle: e.g. 7 solar panels
+    # feeding data centers alternate between 17 and 18 running units. Those stretches are handled by
+    # stepping until two consecutive periods show the same change, then extrapolating whole periods.
+    # Running programs are handled the same way, with periods made of whole program loops: once
+    # every command in the loop stays affordable, each loop changes resources and ideology scores
+    # by the same amount. A detected cycle is kept and reused in later windows for as long as
+    # nothing it depends on changes, so it is only stepped through once.
+    #
+    # Armies only stop a jump while defenders are fighting. Adversary growth and surges are
+    # projected in closed form, one stretch between surges at a time.
+
+    # ticks kept between a closed-form jump and a limit whose position depends on float division
+    safetyMargin = 1
+
+    # jumps shorter than this are not worth the analysis and are stepped instead
+    minJumpTicks = 2
+
+    # longest cycle looked for when extrapolating periodic stretches, in whole program loops when
+    # programs are running
+    maxPeriod = 12
+
+    # most ticks stepped while looking for a cycle. looking costs a little more than stepping, and
+    # programs whose loops only line up every few thousand ticks are stepped without looking.
+    maxSearchTicks = 8192
+
+    def __init__(self, state : GameState):
+        self.state = state
+        self.cycle: PeriodicCycle = None # the last cycle found by periodicJump
+
+    def advance(self, tickCount : int):
+        state = self.state
+        if len(state.actions.pending) > 0:
+            state.actions.applyPending()
+        remaining = tickCount
+        while remaining > 0:
+            # stepped ticks may complete a project whose modifiers change storage
+            state.updateStorageIfDirty()
+            rates = self.computeRates()
+            if len(self.activePrograms()) > 0:
+                # programs act every processor cycle, so only whole program loops can be skipped
+                remaining -= self.periodicJump(rates, remaining)
+                continue
+            horizon = self.quietTicks(rates, remaining)
+            if horizon >= self.minJumpTicks:
+                self.jump(rates, horizon)
+                remaining -= horizon
+            elif self.isStarved(rates):
+                remaining -= self.periodicJump(rates, remaining)
+            else:
+                state.advance(1)
+                remaining -= 1
+
+    def computeRates(self) -> SteadyRates:
+        # per-tick change of every resource, assuming all upkeep and project payments are met
+        state = self.state
+        ledger = state.ledger
+        rates = SteadyRates(len(ledger.count))
+        delta = rates.delta
+        demand = rates.demand
+
+        for e in state.ongoingEvents:
+            for rName, prod in e.info.income.items():
+                rIndex = ledger.resourceIndex[rName]
+                delta[rIndex] += prod
+                if prod < 0.0:
+                    demand[rIndex] -= prod
+
+        for bIndex, activeCount in enumerate(ledger.activeCounts):
+            if activeCount == 0:
+                continue
+            for rIndex, prod in ledger.productionRows[bIndex]:
+                delta[rIndex] += prod * activeCount
+                if prod < 0.0:
+                    demand[rIndex] -= prod * activeCount
+            for rIndex, cost in ledger.upkeepRows[bIndex]:
+                delta[rIndex] -= cost * activeCount
+                demand[rIndex] += cost * activeCount
+
+        for pState in state.projects.values():
+            pInfo = pState.info
+            for rName, rPayment in pState.resourcePayments.items():
+                if rPayment == 0:
+                    continue
+                rIndex = ledger.resourceIndex[rName]
+                delta[rIndex] -= rPayment
+                demand[rIndex] += rPayment
+                rates.projectProgress[pInfo.name] = rates.projectProgress.get(pInfo.name, 0.0) + rPayment * pInfo.resourceRates[rName]
+
+        return rates
+
+    def isStarved(self, rates : SteadyRates) -> bool:
+        ledger = self.state.ledger
+        return any(ledger.count[rIndex] < rates.demand[rIndex] for rIndex in range(0, len(ledger.count)))
+
+    def quietTicks(self, rates : SteadyRates, limit : int) -> int:
+        # the number of upcoming ticks, at most limit, in which nothing discrete happens
+        state = self.state
+        ledger = state.ledger
+        horizon = self.scheduledTicks(rates, limit)
+
+        # resources must stay between their per-tick demand and their storage cap
+        for rIndex in range(0, len(ledger.count)):
+            c = ledger.count[rIndex]
+            s = ledger.storage[rIndex]
+            d = rates.delta[rIndex]
+            need = rates.demand[rIndex]
+            if c > s or c < need:
+                return 0
+            if d > 0.0 and c < s:
+                horizon = min(horizon, self.ticksWhile(s - c, d))
+            elif d < 0.0 and need > 0.0:
+                horizon = min(horizon, self.ticksWhile(c - need, -d) + 1)
+
+        for pName, progressRate in rates.projectProgress.items():
+            if progressRate <= 0.0:
+                continue
+            remainingProgress = state.getProjectCost(pName) - state.projects[pName].progress
+            if remainingProgress <= 0.0:
+                return 0
+            horizon = min(horizon, self.ticksWhile(remainingProgress, progressRate))
+
+        return max(0, horizon)
+
+    def scheduledTicks(self, rates : SteadyRates, limit : int) -> int:
+        # the number of upcoming ticks, at most limit, before an event or army acts. unlike
+        # resource limits these do not depend on how resources change.
+        state = self.state
+        horizon = limit
+
+        # events become due once the tick counter reaches ticksRequired
+        ticksUntilEvent = state.eventManager.ticksUntilNextEvent()
+        if ticksUntilEvent is not None:
+            horizon = min(horizon, ticksUntilEvent)
+
+        # armies: defenders must be idle so fights are a no-op. adversaries grow and surge in
+        # closed form, see jumpArmies, so they do not limit the jump.
+        count = state.ledger.count
+        for dState in state.defenders.values():
+            rIndex = dState.rState.index
+            if count[rIndex] != 0.0 or rates.delta[rIndex] != 0.0:
+                horizon = min(horizon, state.ticksUntilArmyCycle)
+
+        return max(0, horizon)
+
+    def ticksWhile(self, room : float, rate : float) -> int:
+        # ticks for which room - ticks * rate stays non-negative, less a safety margin for rounding
+        return max(0, math.floor(room / rate) - self.safetyMargin)
+
+    def jump(self, rates : SteadyRates, tickCount : int):
+        state = self.state
+        ledger = state.ledger
+        count = ledger.count
+        storage = ledger.storage
+
+        for rIndex, d in enumerate(rates.delta):
+            ledger.income[rIndex] = d
+            if d != 0.0:
+                # resources already at their cap with positive income stay pinned to the cap
+                count[rIndex] = min(count[rIndex] + d * tickCount, storage[rIndex])
+
+        for pName, progressRate in rates.projectProgress.items():
+            state.projects[pName].progress += progressRate * tickCount
+
+        self.advanceClocks(tickCount)
+
+    def advanceClocks(self, tickCount : int):
+        # moves cycle counters, armies, ranks and the tick counter forward over a jump
+        state = self.state
+        params = state.params
+        period = params.ticksPerProcessorCycle + 1
+        processorRuns, state.ticksUntilProcessorCycle = self.cycleRuns(state.ticksUntilProcessorCycle, tickCount, period)
+        armyRuns, state.ticksUntilArmyCycle = self.cycleRuns(state.ticksUntilArmyCycle, tickCount, period)
+        if armyRuns > 0:
+            self.jumpArmies(armyRuns)
+
+        # scores move with extrapolated program loops, and a command run by the player since the
+        # last tick may still need its rank update. jumps never cross a rank that has modifiers.
+        for iState in state.ideologies.values():
+            ModifierManager.updateIdeologyRank(state, iState)
+        if state.modifiers.hasIdeologySources:
+            state.updateModifiers()
+
+        state.ticks += tickCount
+
+    def periodicJump(self, rates : SteadyRates, limit : int) -> int:
+        # steps whole base periods until two consecutive periods change every resource, project and
+        # ideology by the same amount while the programs come back to the same instruction, then
+        # extrapolates whole periods. returns the number of ticks advanced, stepped or not.
+        state = self.state
+        window = self.scheduledTicks(rates, limit)
+        if window < self.minJumpTicks:
+            state.advance(1)
+            return 1
+
+        programs = self.activePrograms()
+        projects = [state.projects[pName] for pName in rates.projectProgress.keys()]
+        key = self.cycleKey(rates, programs)
+
+        # the cycle found in an earlier window still holds if nothing it depends on changed and
+        # the state is where the cycle says it is, so it is used without looking for it again.
+        # the state is only compared with the cycle at its boundaries.
+        cycle = self.cycle
+        if cycle is not None and cycle.key == key:
+            ticksToBoundary = cycle.ticksToBoundary(state.ticks)
+            if ticksToBoundary > 0:
+                ticks = min(ticksToBoundary, window)
+                state.advance(ticks)
+                return ticks
+            current = self.recordPeriodState(projects, programs)
+            if cycle.matches(current):
+                periods = self.extrapolatedPeriods(cycle, rates, programs, projects, current, window)
+                if periods > 0:
+                    self.applyPeriods(cycle, projects, periods)
+                    return cycle.period * periods
+                if window < cycle.period:
+                    state.advance(window)
+                    return window
+                # a value reached a limit, which usually changes the cycle, e.g. a resource that
+                # stops drifting at its cap, so the cycle is found again from here
+        self.cycle = None
+
+        # with programs running, a period covers whole loops of every program
+        basePeriod = 1
+        for program in programs:
+            basePeriod = math.lcm(basePeriod, program.loopCycles())
+        if len(programs) > 0:
+            basePeriod *= state.params.ticksPerProcessorCycle + 1
+
+        # finding a cycle takes two whole periods, so a window without room for them is stepped
+        searchTicks = min(2 * self.maxPeriod * basePeriod, window, self.maxSearchTicks)
+        if 2 * basePeriod > searchTicks:
+            state.advance(window)
+            return window
+
+        # only the state at each base period boundary is kept, and the range every value covered
+        # within each base period
+        boundaries = [self.recordPeriodState(projects, programs)]
+        blockRanges: List[PeriodRanges] = []
+        period = 0
+        ticksStepped = 0
+        while period == 0 and ticksStepped + basePeriod <= searchTicks:
+            ranges = PeriodRanges(boundaries[-1])
+            state.advance(basePeriod, lambda: ranges.add(self.periodValues(projects)))
+            ticksStepped += basePeriod
+            boundaries.append(self.recordPeriodState(projects, programs))
+            blockRanges.append(ranges)
+            period = self.findPeriod(boundaries)
+
+        if period == 0:
+            # no cycle within the search, e.g. programs stalling on costs, so the rest of the
+            # window is stepped rather than searched again
+            if len(programs) == 0:
+                return ticksStepped
+            state.advance(window - ticksStepped)
+            return window
+
+        ranges = PeriodRanges.merged(blockRanges[-period:])
+        cycle = PeriodicCycle(key, period * basePeriod, state.ticks, boundaries[-1 - period], boundaries[-1], ranges)
+        # the cycle is only kept when nothing it depends on changed while it was being found
+        if self.cycleKey(self.computeRates(), programs) == key:
+            self.cycle = cycle
+        periods = self.extrapolatedPeriods(cycle, rates, programs, projects, boundaries[-1], window - ticksStepped)
+        if periods <= 0:
+            return ticksStepped
+        self.applyPeriods(cycle, projects, periods)
+        return ticksStepped + cycle.period * periods
+
+    def extrapolatedPeriods(self, cycle : PeriodicCycle, rates : SteadyRates, programs : List[GameProgram],
+                            projects : List[ProjectState], current : tuple, room : int) -> int:
+        # how many whole periods of the cycle fit in room ticks from the current state without a
+        # discrete change, from the range each value covered over the last period
+        state = self.state
+        ledger = state.ledger
+        periods = room // cycle.period
+        if periods <= 0:
+            return 0
+        countDeltas, progressDeltas, scoreDeltas = cycle.deltas
+
+        # each program runs at most one command per tick, so this bounds what programs take per tick
+        demand = list(rates.demand)
+        for program in programs:
+            for rIndex, v in program.maxCommandDemand().items():
+                demand[rIndex] += v
+
+        # resources that drift from one period to the next must stay clear of their cap, and of the
+        # demand of buildings, projects and commands so every cost stays affordable
+        countLows, countHighs = cycle.ranges(0, current)
+        for rIndex in range(0, len(ledger.count)):
+            d = countDeltas[rIndex]
+            if d == 0.0:
+                continue
+            low = countLows[rIndex]
+            high = countHighs[rIndex]
+            if low < demand[rIndex] or high >= ledger.storage[rIndex]:
+                return 0
+            if d > 0.0:
+                periods = min(periods, self.ticksWhile(ledger.storage[rIndex] - high, d))
+            elif demand[rIndex] > 0.0:
+                periods = min(periods, self.ticksWhile(low - demand[rIndex], -d))
+
+        progressLows, progressHighs = cycle.ranges(1, current)
+        for pIndex, pState in enumerate(projects):
+            d = progressDeltas[pIndex]
+            if d > 0.0:
+                periods = min(periods, self.ticksWhile(state.getProjectCost(pState.info.name) - progressHighs[pIndex], d))
+
+        # when ideology ranks scale anything, scores must stay within the current rank
+        if state.modifiers.hasIdeologySources:
+            scoreLows, scoreHighs = cycle.ranges(2, current)
+            for iIndex, iState in enumerate(state.ideologies.values()):
+                d = scoreDeltas[iIndex]
+                if d == 0.0:
+                    continue
+                if scoreLows[iIndex] <= 0.0 <= scoreHighs[iIndex]:
+                    return 0
+                sign = 1.0 if iState.totalScore > 0.0 else -1.0
+                rankStart = abs(iState.totalScore) - iState.localRankScore
+                if d * sign > 0.0:
+                    highest = max(abs(scoreLows[iIndex]), abs(scoreHighs[iIndex]))
+                    periods = min(periods, self.ticksWhile(rankStart + iState.localRankThreshold - highest, abs(d)))
+                else:
+                    lowest = min(abs(scoreLows[iIndex]), abs(scoreHighs[iIndex]))
+                    periods = min(periods, self.ticksWhile(lowest - rankStart, abs(d)))
+
+        return max(0, periods)
+
+    def applyPeriods(self, cycle : PeriodicCycle, projects : List[ProjectState], periods : int):
+        state = self.state
+        ledger = state.ledger
+        countDeltas, progressDeltas, scoreDeltas = cycle.deltas
+        for rIndex, d in enumerate(countDeltas):
+            if d != 0.0:
+                ledger.count[rIndex] += d * periods
+        for pIndex, pState in enumerate(projects):
+            pState.progress += progressDeltas[pIndex] * periods
+        for iIndex, iState in enumerate(state.ideologies.values()):
+            iState.totalScore += scoreDeltas[iIndex] * periods
+
+        self.advanceClocks(cycle.period * periods)
+
+    def cycleKey(self, rates : SteadyRates, programs : List[GameProgram]) -> tuple:
+        # everything besides the drifting counts that decides what a period of the programs does:
+        # steady rates, storage, the loaded programs and the command cost and production tables
+        state = self.state
+        return (tuple(rates.delta), tuple(rates.demand), tuple(rates.projectProgress.items()),
+                tuple(state.ledger.storage),
+                tuple((program, program.assignedProcessors, tuple((c.info.name, c.maxCount) for c in program.commands)) for program in programs),
+                state.modifiers.commandCost, state.modifiers.commandProduction)
+
+    def activePrograms(self) -> List[GameProgram]:
+        return [p for p in self.state.programs if p.assignedProcessors > 0 and len(p.commands) > 0]
+
+    def periodValues(self, projects : List[ProjectState]) -> tuple:
+        # (resource counts, project progress, ideology scores)
+        state = self.state
+        return (state.ledger.count.tolist(),
+                [pState.progress for pState in projects],
+                [iState.totalScore for iState in state.ideologies.values()])
+
+    def recordPeriodState(self, projects : List[ProjectState], programs : List[GameProgram]) -> tuple:
+        # the period values, and the processor clock and program positions
+        state = self.state
+        return self.periodValues(projects) + ((state.ticksUntilProcessorCycle, [program.position() for program in programs]),)
+
+    def findPeriod(self, boundaries : list) -> int:
+        # the fewest base periods k such that the last two stretches of k base periods changed
+        # everything by the same amount and left the programs where they started, from the states
+        # at the base period boundaries. changes that are zero must match exactly, since those are
+        # the resources whose exact value decides how many buildings run and which commands can be
+        # afforded.
+        last = len(boundaries) - 1
+        for k in range(1, last // 2 + 1):
+            a = boundaries[last - 2 * k]
+            b = boundaries[last - k]
+            c = boundaries[last]
+            if a[3] != b[3] or b[3] != c[3]:
+                continue
+            if self.sameChange(a[0], b[0], c[0]) and self.sameChange(a[1], b[1], c[1]) and self.sameChange(a[2], b[2], c[2]):
+                return k
+        return 0
+
+    @staticmethod
+    def sameChange(a : List[float], b : List[float], c : List[float]) -> bool:
+        for i in range(0, len(a)):
+            first = b[i] - a[i]
+            second = c[i] - b[i]
+            if first == second:
+                continue
+            if first == 0.0 or second == 0.0:
+                return False
+            if abs(first - second) > 1e-9 * max(1.0, abs(c[i])):
+                return False
+        return True
+
+    def jumpArmies(self, runs : int):
+        # strength follows s' = s * (1 - decay) + spawn on each army cycle. a surge happens at the
+        # end of the first cycle that takes ticksToSurge below zero, and changes the strength and
+        # spawn rate, so the runs are projected one stretch between surges at a time.
+        state = self.state
+        ticksPerArmyCycle = state.params.ticksPerArmyCycle
+        for aState in state.adversaries.values():
+            if not aState.unlocked:
+                continue
+            q = 1.0 - aState.decayRate
+            runsLeft = runs
+            while runsLeft > 0:
+                runsToSurge = max(1, math.floor(aState.ticksToSurge / ticksPerArmyCycle) + 1)
+                stretch = min(runsLeft, runsToSurge)
+                if q == 1.0:
+                    aState.strength += aState.spawnRate * stretch
+                else:
+                    qRuns = math.pow(q, stretch)
+                    aState.strength = aState.strength * qRuns + aState.spawnRate * (1.0 - qRuns) / (1.0 - q)
+                aState.ticksToSurge -= ticksPerArmyCycle * stretch
+                runsLeft -= stretch
+                if aState.ticksToSurge < 0:
+                    state.armySurge(aState.info.name)
+
+        # defenders are idle, so effectiveness only depends on whether an adversary has any strength
+        for aState in state.adversaries.values():
+            aState.effectiveness = 0 if aState.strength == 0 else 1.0
+
+    @staticmethod
+    def cycleRuns(ticksUntilCycle : int, tickCount : int, period : int):
+        # the number of cycles that run in the next tickCount ticks, and the counter afterwards
+        if tickCount <= ticksUntilCycle:
+            return 0, ticksUntilCycle - tickCount
+        after = tickCount - ticksUntilCycle - 1
+        return 1 + after // period, (period - 1) - after % period
+
+class PeriodRanges:
+    # the lowest and highest resource counts, project progress and ideology scores seen over a
+    # stretch of ticks, kept up to date tick by tick instead of keeping every tick
+    def __init__(self, values : tuple):
+        self.lows: List[List[float]] = [list(values[part]) for part in range(0, 3)]
+        self.highs: List[List[float]] = [list(values[part]) for part in range(0, 3)]
+
+    def add(self, values : tuple):
+        for part in range(0, 3):
+            self.lows[part] = list(map(min, self.lows[part], values[part]))
+            self.highs[part] = list(map(max, self.highs[part], values[part]))
+
+    @staticmethod
+    def merged(rangesList : List[PeriodRanges]) -> PeriodRanges:
+        merged = PeriodRanges(tuple(rangesList[0].lows))
+        for ranges in rangesList:
+            merged.add(ranges.lows)
+            merged.add(ranges.highs)
+        return merged
+
+class PeriodicCycle:
+    # a cycle found by periodicJump: the state at the end of a period, the change over a period, the
+    # range of each value over the period relative to its value at the end, and the key of what the
+    # cycle depends on. the state is on the cycle at a boundary, every period ticks from endTick,
+    # where the programs are at the recorded position and every count that does not drift has its
+    # recorded value.
+    def __init__(self, key : tuple, period : int, endTick : int, start : tuple, end : tuple, ranges : PeriodRanges):
+        self.key: tuple = key
+        self.period: int = period
+        self.endTick: int = endTick
+        self.end: tuple = end
+        self.deltas: List[List[float]] = [[b - a for a, b in zip(start[part], end[part])] for part in range(0, 3)]
+        self.lowOffsets: List[List[float]] = [[low - value for low, value in zip(ranges.lows[part], end[part])] for part in range(0, 3)]
+        self.highOffsets: List[List[float]] = [[high - value for high, value in zip(ranges.highs[part], end[part])] for part in range(0, 3)]
+
+    def ticksToBoundary(self, tick : int) -> int:
+        return (self.endTick - tick) % self.period
+
+    def matches(self, current : tuple) -> bool:
+        # current must be recorded at a boundary
+        if self.end[3] != current[3]:
+            return False
+        for rIndex, d in enumerate(self.deltas[0]):
+            if d == 0.0 and self.end[0][rIndex] != current[0][rIndex]:
+                return False
+        return True
+
+    def ranges(self, part : int, current : tuple):
+        # lowest and highest value of each entry over the last period, moved to the current values
+        lows = [value + offset for value, offset in zip(current[part], self.lowOffsets[part])]
+        highs = [value + offset for value, offset in zip(current[part], self.highOffsets[part])]
+        return lows, highs
+
+class SteadyRates:
+    def __init__(self, resourceCount : int):
+        self.delta: List[float] = [0.0] * resourceCount # net change per tick
+        self.demand: List[float] = [0.0] * resourceCount # amount consumed per tick
+        self.projectProgress: Dict[str, float] = {} # project progress per tick
@@ -21,6 +21,24 @@ class GameProgram:
         self.instructionPointer: int = 0
         self.assignedProcessors: int = 0
 
+    def loopCycles(self) -> int:
+        # processor cycles in one pass through the command list
+        return sum(max(1, c.maxCount) for c in self.commands)
+
+    def position(self):
+        # where the program is in its loop. equal positions run the same commands from then on.
+        return (self.instructionPointer, tuple(c.count for c in self.commands))
+
+    def maxCommandDemand(self) -> Dict[int, float]:
+        # the most any single cycle of this program can take from each resource, by ledger index
+        ledger = self.state.ledger
+        demand: Dict[int, float] = {}
+        for c in self.commands:
+            for rName, v in self.state.getCommandCost(c.info.name).r.items():
+                rIndex = ledger.resourceIndex[rName]
+                demand[rIndex] = max(demand.get(rIndex, 0.0), v * self.assignedProcessors)
+        return demand
+
     def resetAllCommands(self):
         self.instructionPointer = 0
         for c in self.commands:
@@ -34,8 +52,8 @@ class GameProgram:
             
         curCommand = self.commands[self.instructionPointer]
         
-        for x in range(0, self.assignedProcessors):
-            self.state.runCommand(curCommand.info.name)
+        # every assigned processor runs the command once, applied as a single batch
+        self.state.runCommand(curCommand.info.name, self.assignedProcessors)
             
         curCommand.count += 1
         if curCommand.count >= curCommand.maxCount:
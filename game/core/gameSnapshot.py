@@ -0,0 +1,160 @@
+
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import List, Tuple
+
+from game.core.gameProgram import GameCommand
+
+class GameSnapshot:
+    # the mutable part of a GameState, copied into flat arrays in database order. the database,
+    # the *Info tuples and everything derived from them are shared, so a snapshot is cheap to take
+    # and can be restored into any GameState built from the same database, any number of times.
+    # derived values such as modifier tables and the event schedule are rebuilt on restore.
+    __slots__ = ('ticks', 'ticksUntilProcessorCycle', 'ticksUntilArmyCycle', 'freeProcessorCount', 'storageDirty',
+                 'count', 'income', 'storage', 'activeCounts', 'totalCounts',
+                 'commandsUnlocked', 'resourcesUnlocked', 'buildingsUnlocked',
+                 'researchPurchased', 'researchUnlocked',
+                 'projectPurchaseCounts', 'projectProgress', 'projectPayments',
+                 'eventFlags', 'eventTimestamps', 'activeEvents', 'ongoingEvents',
+                 'ideologyScores', 'ideologyRanks', 'ideologyRankValues',
+                 'adversariesUnlocked', 'adversaryValues', 'defendersUnlocked', 'defenderDecayRates',
+                 'programs')
+
+    def __init__(self, state : GameState):
+        self.ticks: int = state.ticks
+        self.ticksUntilProcessorCycle: int = state.ticksUntilProcessorCycle
+        self.ticksUntilArmyCycle: int = state.ticksUntilArmyCycle
+        self.freeProcessorCount: int = state.freeProcessorCount
+        self.storageDirty: bool = state.dirty.storage
+
+        ledger = state.ledger
+        self.count = array('d', ledger.count)
+        self.income = array('d', ledger.income)
+        self.storage = array('d', ledger.storage)
+        self.activeCounts = array('q', ledger.activeCounts)
+        self.totalCounts = array('q', [b.totalCount for b in state.buildings.values()])
+
+        self.commandsUnlocked = array('B', [c.unlocked for c in state.commands.values()])
+        self.resourcesUnlocked = array('B', [r.unlocked for r in state.resources.values()])
+        self.buildingsUnlocked = array('B', [b.unlocked for b in state.buildings.values()])
+        self.researchPurchased = array('B', [r.purchased for r in state.research.values()])
+        self.researchUnlocked = array('B', [r.unlocked for r in state.research.values()])
+
+        # payments are flattened in the order of each project's resourceRates
+        projects = state.projects.values()
+        self.projectPurchaseCounts = array('q', [p.purchaseCount for p in projects])
+        self.projectProgress = array('d', [p.progress for p in projects])
+        self.projectPayments = array('d', [v for p in projects for v in p.resourcePayments.values()])
+
+        # triggered, completed, ongoing and displayed, one bit each
+        events = state.events.values()
+        self.eventFlags = array('B', [e.triggered | (e.completed << 1) | (e.ongoing << 2) | (e.displayed << 3) for e in events])
+        self.eventTimestamps: List[str] = [e.timestampStr for e in events]
+        eventOrder = state.eventManager.eventOrder
+        self.activeEvents = array('I', [eventOrder[e.info.name] for e in state.activeEvents])
+        self.ongoingEvents = array('I', [eventOrder[e.info.name] for e in state.ongoingEvents])
+
+        ideologies = state.ideologies.values()
+        self.ideologyScores = array('d', [i.totalScore for i in ideologies])
+        self.ideologyRanks = array('q', [i.rank for i in ideologies])
+        self.ideologyRankValues = array('d', [v for i in ideologies for v in (i.localRankScore, i.localRankThreshold)])
+
+        adversaries = state.adversaries.values()
+        self.adversariesUnlocked = array('B', [a.unlocked for a in adversaries])
+        self.adversaryValues = array('d', [v for a in adversaries for v in
+            (a.strength, a.spawnRate, a.ticksToSurge, a.nextSurgeStrength, a.decayRate, a.effectiveness)])
+        self.defendersUnlocked = array('B', [d.unlocked for d in state.defenders.values()])
+        self.defenderDecayRates = array('d', [d.decayRate for d in state.defenders.values()])
+
+        # (instructionPointer, assignedProcessors, ((info, count, maxCount), ...)) per program
+        self.programs: Tuple = tuple(
+            (p.instructionPointer, p.assignedProcessors, tuple((c.info, c.count, c.maxCount) for c in p.commands))
+            for p in state.programs)
+
+    def byteSize(self) -> int:
+        # approximate memory held by the snapshot. strings and *Info tuples are shared and not counted.
+        size = sys.getsizeof(self)
+        for name in GameSnapshot.__slots__:
+            value = getattr(self, name)
+            if isinstance(value, (array, list, tuple)):
+                size += sys.getsizeof(value)
+        return size
+
+    def restore(self, state : GameState):
+        state.ticks = self.ticks
+        state.ticksUntilProcessorCycle = self.ticksUntilProcessorCycle
+        state.ticksUntilArmyCycle = self.ticksUntilArmyCycle
+        state.freeProcessorCount = self.freeProcessorCount
+
+        # the ledger arrays are written in place since numpy views share their memory
+        ledger = state.ledger
+        ledger.count[:] = self.count
+        ledger.income[:] = self.income
+        ledger.storage[:] = self.storage
+        ledger.activeCounts[:] = self.activeCounts
+        for b, totalCount, unlocked in zip(state.buildings.values(), self.totalCounts, self.buildingsUnlocked):
+            b.totalCount = totalCount
+            b.unlocked = bool(unlocked)
+
+        for c, unlocked in zip(state.commands.values(), self.commandsUnlocked):
+            c.unlocked = bool(unlocked)
+        for r, unlocked in zip(state.resources.values(), self.resourcesUnlocked):
+            r.unlocked = bool(unlocked)
+
+        state.purchasedResearch.clear()
+        for r, purchased, unlocked in zip(state.research.values(), self.researchPurchased, self.researchUnlocked):
+            r.purchased = bool(purchased)
+            r.unlocked = bool(unlocked)
+            if r.purchased:
+                state.purchasedResearch.add(r.info.name)
+
+        paymentIndex = 0
+        for p, purchaseCount, progress in zip(state.projects.values(), self.projectPurchaseCounts, self.projectProgress):
+            p.purchaseCount = purchaseCount
+            p.progress = progress
+            for rName in p.resourcePayments.keys():
+                p.resourcePayments[rName] = self.projectPayments[paymentIndex]
+                paymentIndex += 1
+
+        events = list(state.events.values())
+        for e, flags, timestampStr in zip(events, self.eventFlags, self.eventTimestamps):
+            e.triggered = bool(flags & 1)
+            e.completed = bool(flags & 2)
+            e.ongoing = bool(flags & 4)
+            e.displayed = bool(flags & 8)
+            e.timestampStr = timestampStr
+        state.activeEvents = [events[i] for i in self.activeEvents]
+        state.ongoingEvents = [events[i] for i in self.ongoingEvents]
+
+        for n, i in enumerate(state.ideologies.values()):
+            i.totalScore = self.ideologyScores[n]
+            i.rank = self.ideologyRanks[n]
+            i.localRankScore = self.ideologyRankValues[n * 2]
+            i.localRankThreshold = self.ideologyRankValues[n * 2 + 1]
+
+        for n, a in enumerate(state.adversaries.values()):
+            a.unlocked = bool(self.adversariesUnlocked[n])
+            (a.strength, a.spawnRate, a.ticksToSurge, a.nextSurgeStrength,
+                a.decayRate, a.effectiveness) = self.adversaryValues[n * 6 : n * 6 + 6]
+        for d, unlocked, decayRate in zip(state.defenders.values(), self.defendersUnlocked, self.defenderDecayRates):
+            d.unlocked = bool(unlocked)
+            d.decayRate = decayRate
+
+        for program, (instructionPointer, assignedProcessors, commands) in zip(state.programs, self.programs):
+            program.instructionPointer = instructionPointer
+            program.assignedProcessors = assignedProcessors
+            program.commands = []
+            for info, count, maxCount in commands:
+                command = GameCommand(info)
+                command.count = count
+                command.maxCount = maxCount
+                program.commands.append(command)
+
+        # rebuild what is derived from the restored values
+        state.eventManager.rebuild()
+        state.updateModifiers()
+        state.dirty.storage = state.dirty.storage or self.storageDirty
+        state.dirty.events = True
+        state.dirty.projects = True
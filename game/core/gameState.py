@@ -1,11 +1,10 @@
 
 from __future__ import annotations
-from ast import Str
 
 import json
 import os
 import math
-from typing import Dict, List, NamedTuple, Set
+from typing import Callable, Dict, List, NamedTuple, Set
 from game.core.gameProgram import GameProgram, GameCommand
 
 from game.database.gameDatabase import (ResourceList, GameDatabase, GameParams, CommandInfo,
@@ -13,29 +12,83 @@ from game.database.gameDatabase import (ResourceList, GameDatabase, GameParams,
     DefenderInfo)
 
 from game.core.eventManager import EventManager
-from game.core.modifierManager import ModifierManager
-
+from game.core.modifierManager import ModifierManager, ModifierTables
+from game.core.resourceLedger import ResourceLedger
+from game.core.fastForward import FastForward
+from game.core.costCache import CostCache
+from game.core.gameSnapshot import GameSnapshot
+from game.core.actionQueue import ActionQueue
+
+# state objects are slotted: they are created for every database entry of every GameState, and
+# their attributes are read many times per tick.
 class CommandState:
+    __slots__ = ('info', 'unlocked')
+
     def __init__(self, info : CommandInfo):
         self.info: CommandInfo = info
         self.unlocked: bool = False
 
 class BuildingState:
-    def __init__(self, info : BuildingInfo):
+    __slots__ = ('info', 'ledger', 'index', 'totalCount', 'unlocked')
+
+    def __init__(self, info : BuildingInfo, ledger : ResourceLedger, index : int):
         self.info: BuildingInfo = info
+        self.ledger: ResourceLedger = ledger
+        self.index: int = index
         self.totalCount: int = 0
-        self.activeCount: int = 0
         self.unlocked: bool = False
+
+    # the active count lives in the ledger so building production can be applied as a matrix product
+    @property
+    def activeCount(self) -> int:
+        return self.ledger.activeCounts[self.index]
+
+    @activeCount.setter
+    def activeCount(self, value : int):
+        self.ledger.activeCounts[self.index] = value
         
 class ResourceState:
-    def __init__(self, info : ResourceInfo):
+    # thin view over the ledger arrays. count, income and storage are stored in the ledger.
+    # the properties keep the old attribute interface, but every read goes through the property
+    # and an array index, several times slower than a plain slot. code that reads many counts,
+    # such as the tick loop, cost checks and the views, binds ledger.count and the index locally
+    # instead, e.g. count = state.ledger.count; count[rState.index].
+    __slots__ = ('info', 'ledger', 'index', 'unlocked')
+
+    def __init__(self, info : ResourceInfo, ledger : ResourceLedger, index : int):
         self.info: ResourceInfo = info
-        self.income: float = 0 # will be negative if more of the resource is consumed than produced
-        self.storage: float = 0
-        self.count: float = 0
+        self.ledger: ResourceLedger = ledger
+        self.index: int = index
         self.unlocked: bool = False
 
+    @property
+    def count(self) -> float:
+        return self.ledger.count[self.index]
+
+    @count.setter
+    def count(self, value : float):
+        self.ledger.count[self.index] = value
+
+    @property
+    def income(self) -> float:
+        # will be negative if more of the resource is consumed than produced
+        return self.ledger.income[self.index]
+
+    @income.setter
+    def income(self, value : float):
+        self.ledger.income[self.index] = value
+
+    @property
+    def storage(self) -> float:
+        return self.ledger.storage[self.index]
+
+    @storage.setter
+    def storage(self, value : float):
+        self.ledger.storage[self.index] = value
+
 class EventState:
+    __slots__ = ('info', 'triggered', 'completed', 'ongoing', 'displayed', 'timestampStr')
+
     def __init__(self, info : EventInfo):
         self.info: EventInfo = info
         
@@ -47,12 +100,16 @@ class EventState:
         self.timestampStr : str = None
 
 class ResearchState:
+    __slots__ = ('info', 'purchased', 'unlocked')
+
     def __init__(self, info : ResearchInfo):
         self.info: ResearchInfo = info
         self.purchased: bool = False
         self.unlocked: bool = False
 
 class ProjectState:
+    __slots__ = ('info', 'purchaseCount', 'resourcePayments', 'progress')
+
     def __init__(self, info : ProjectInfo):
         self.info: ProjectInfo = info
         self.purchaseCount: int = 0
@@ -60,6 +117,8 @@ class ProjectState:
         self.progress: float = 0.0
 
 class IdeologyState:
+    __slots__ = ('info', 'totalScore', 'rank', 'localRankScore', 'localRankThreshold')
+
     def __init__(self, info : IdeologyInfo):
         self.info: IdeologyInfo = info
         self.totalScore: float = 0
@@ -68,6 +127,8 @@ class IdeologyState:
         self.localRankThreshold: float = 0
         
 class AdversaryState:
+    __slots__ = ('info', 'unlocked', 'strength', 'spawnRate', 'ticksToSurge', 'nextSurgeStrength', 'decayRate', 'effectiveness')
+
     def __init__(self, info : AdversaryInfo):
         self.info: AdversaryInfo = info
         self.unlocked: bool = False
@@ -79,6 +140,8 @@ class AdversaryState:
         self.effectiveness: float = 0
         
 class DefenderState:
+    __slots__ = ('info', 'rState', 'unlocked', 'decayRate')
+
     def __init__(self, info : DefenderInfo):
         self.info: DefenderInfo = info
         self.rState: ResourceState = None
@@ -89,11 +152,17 @@ class DirtyState:
     def __init__(self):
         self.events: bool = True
         self.projects: bool = True
+        self.storage: bool = True # storage and processor allocation need a full recompute
+        self.reset: bool = False # the state was reset in place, e.g. by retiring
         
 class GameState:
-    def __init__(self, database : GameDatabase):
+    def __init__(self, database : GameDatabase, source : GameState = None):
+        # when source is given the new state is a copy of it that shares its derived tables, see clone
         self.database: GameDatabase = database
         self.params: GameParams = self.database.params # quick access to params
+        self.ledger: ResourceLedger = ResourceLedger(database, source.ledger if source is not None else None)
+        self.costCache: CostCache = CostCache(self)
+        self.modifiers: ModifierTables = ModifierTables(self, source.modifiers if source is not None else None)
         
         self.commands: Dict[str, CommandState] = {}
         for cInfp in database.commands.values():
@@ -101,14 +170,14 @@ class GameState:
             
         self.buildings: Dict[str, BuildingState] = {}
         for bInfo in database.buildings.values():
-            bState = BuildingState(bInfo)
+            bState = BuildingState(bInfo, self.ledger, self.ledger.buildingIndex[bInfo.name])
             bState.totalCount = database.params.startingBuildings[bInfo.name]
             bState.activeCount = bState.totalCount
             self.buildings[bInfo.name] = bState
 
         self.resources: Dict[str, ResourceState] = {}
         for rInfo in database.resources.values():
-            rState = ResourceState(rInfo)
+            rState = ResourceState(rInfo, self.ledger, self.ledger.resourceIndex[rInfo.name])
             rState.count = database.params.startingResources[rInfo.name]
             self.resources[rInfo.name] = rState
 
@@ -153,6 +222,22 @@ class GameState:
             self.programs.append(GameProgram(self))
         self.programs[0].assignedProcessors = 1
         self.freeProcessorCount = 0
+
+        self.eventManager: EventManager = EventManager(self)
+        self.fastForwarder: FastForward = FastForward(self)
+        self.activeEvents: List[EventState] = []
+        self.ongoingEvents: List[EventState] = []
+        self.ticks: int = 0
+        self.ticksUntilProcessorCycle: int = 0
+        self.ticksUntilArmyCycle: int = 0
+        self.dirty: DirtyState = DirtyState()
+        self.actions: ActionQueue = ActionQueue(self)
+
+        if source is not None:
+            self.debugSkipEvents = source.debugSkipEvents
+            self.startingSnapshot: GameSnapshot = source.startingSnapshot
+            self.restore(source.snapshot())
+            return
         
         for objectToUnlock in self.database.params.startingUnlocks:
             self.unlock(objectToUnlock)
@@ -174,16 +259,35 @@ class GameState:
                 
         self.debugSkipEvents = True
 
-        self.eventManager: EventManager = EventManager(self)
-        self.activeEvents: List[EventState] = []
-        self.ongoingEvents: List[EventState] = []
-        self.ticks: int = 0
-        self.ticksUntilProcessorCycle: int = 0
-        self.ticksUntilArmyCycle: int = 0
-        self.dirty: DirtyState = DirtyState()
-
         self.step()
 
+        # retiring resets the state to this snapshot rather than walking the database again
+        self.startingSnapshot: GameSnapshot = self.snapshot()
+
+    def snapshot(self) -> GameSnapshot:
+        return GameSnapshot(self)
+
+    def restore(self, snapshot : GameSnapshot):
+        snapshot.restore(self)
+
+    def clone(self) -> GameState:
+        return GameState(self.database, self)
+
+    def retire(self):
+        # starts again as a new AI. the state is reset in place to its starting snapshot, except for
+        # projects marked persistentR, which keep their purchase count and progress. pending actions
+        # are dropped and a running journal starts over, since ticks start over as well.
+        persistent = [(pState, pState.purchaseCount, pState.progress) for pState in self.projects.values() if pState.info.persistentR]
+        self.actions.pending = []
+        self.restore(self.startingSnapshot)
+        for pState, purchaseCount, progress in persistent:
+            pState.purchaseCount = purchaseCount
+            pState.progress = progress
+        self.updateModifiers()
+        if self.actions.journal is not None:
+            self.actions.startJournal()
+        self.dirty.reset = True
+
     def convertPerTickToPerSecond(self, tickRate : float) -> float:
         return tickRate * self.database.params.ticksPerPlayerSecond
     
@@ -201,13 +305,14 @@ class GameState:
             print('objectToUnlock not found: ' + objectToUnlock)
             
     def updateProjectPayments(self):
+        ledger = self.ledger
         for pState in self.projects.values():
             pInfo = pState.info
             for rName, rPayment in pState.resourcePayments.items():
-                r = self.resources[rName]
-                r.income -= rPayment
-                totalPayment = min(rPayment, r.count)
-                r.count -= totalPayment
+                rIndex = ledger.resourceIndex[rName]
+                ledger.income[rIndex] -= rPayment
+                totalPayment = min(rPayment, ledger.count[rIndex])
+                ledger.count[rIndex] -= totalPayment
                 pState.progress += totalPayment * pInfo.resourceRates[rName]
             
             totalProjectCost = self.getProjectCost(pInfo.name)
@@ -215,69 +320,35 @@ class GameState:
                 self.completeProject(pInfo.name)
 
     def updateStorage(self):
-        for r in self.resources.values():
-            r.storage = self.database.params.startingStorage[r.info.name]
-        
-        # update storage from buildings
-        for bState in self.buildings.values():
-            bInfo = bState.info
-            
-            # buildings with storage should not have upkeep requirements
-            for rName, stor in bInfo.storage.items():
-                rState = self.resources[rName]
-                rState.storage += bState.activeCount * stor
-
+        # buildings with storage should not have upkeep requirements
+        self.ledger.recomputeStorage()
 
     def updateIncomeAndBuildingProduction(self):
         # because buildings that fail upkeep don't produce resources, we must handle
         # income and building proudction in the same function.
-    
-        for r in self.resources.values():
-            r.income = 0
+        ledger = self.ledger
+        count = ledger.count
+        income = ledger.income
+        ledger.resetIncome()
         
         # update resources from ongoing events
         for e in self.ongoingEvents:
             for rName, prod in e.info.income.items():
-                rState = self.resources[rName]
-                rState.income += prod
-                rState.count += prod
-
-        # update resources from buildings
-        for bState in self.buildings.values():
-            if bState.activeCount == 0:
-                continue
-            
-            bInfo = bState.info
-            bName = bInfo.name
-            
-            bProduction = self.getBuildingProduction(bName)
-            bUpkeep = self.getBuildingUpkeep(bName)
-            if len(bUpkeep.r) == 0:
-                for rName, prod in bInfo.production.items():
-                    rState = self.resources[rName]
-                    rState.income += prod * bState.activeCount
-                    rState.count += prod * bState.activeCount
+                rIndex = ledger.resourceIndex[rName]
+                income[rIndex] += prod
+                count[rIndex] += prod
+
+        # update resources from buildings, in database order
+        for segment in ledger.segments:
+            if segment.hasUpkeep:
+                # for buildings with upkeep, the number of units that can afford upkeep this tick
+                # is resolved in closed form rather than one at a time.
+                ledger.applyUpkeepBuilding(segment)
             else:
-                # upkeep counts as negative income
-                for rName, cost in bUpkeep.r.items():
-                    rState = self.resources[rName]
-                    rState.income -= cost * bState.activeCount
-                    
-                # for buildings with upkeep, production is handled one at a time in case
-                # there are not sufficient upkeep resources.
-                for i in range(0, bState.activeCount):
-                    if self.canAffordCost(bUpkeep):
-                        self.spendResources(bUpkeep)
-                    else:
-                        continue
-
-                    for rName, prod in bInfo.production.items():
-                        rState = self.resources[rName]
-                        rState.income += prod
-                        rState.count += prod
+                ledger.applyProductionBlock(segment)
         
     def updateProcessorAllocation(self):
-        self.freeProcessorCount = self.resources['Processors'].storage
+        self.freeProcessorCount = int(self.resources['Processors'].storage)
         for program in self.programs:
             if program.assignedProcessors <= self.freeProcessorCount:
                 self.freeProcessorCount -= program.assignedProcessors
@@ -288,6 +359,30 @@ class GameState:
     def updateStorageAndProcessors(self):
         self.updateStorage()
         self.updateProcessorAllocation()
+        self.dirty.storage = False
+
+    def updateStorageIfDirty(self):
+        # storage only changes with buildings and research. building changes are applied
+        # incrementally as they happen, anything broader marks dirty.storage for a full recompute.
+        if self.dirty.storage:
+            self.updateStorageAndProcessors()
+
+    def updateModifiers(self):
+        # rebuilds everything derived from the modifier tables when a modifier source changed level
+        if not self.modifiers.refresh():
+            return
+        modifiers = self.modifiers
+        self.ledger.setBuildingTables(modifiers.buildingProduction, modifiers.buildingUpkeep, modifiers.buildingStorage)
+        self.costCache.invalidate()
+        self.dirty.storage = True
+
+    def changeActiveCount(self, bState : BuildingState, activeCount : int):
+        delta = activeCount - bState.activeCount
+        if delta == 0:
+            return
+        bState.activeCount = activeCount
+        self.ledger.addBuildingStorage(bState.index, delta)
+        self.updateProcessorAllocation()
         
     def runAllPrograms(self):
         for program in self.programs:
@@ -318,19 +413,21 @@ class GameState:
             if aState.ticksToSurge < 0:
                 self.armySurge(aState.info.name)
                 
+        count = self.ledger.count
+        
         # process defender attrition
         for dState in self.defenders.values():
             if not dState.unlocked:
                 continue
             
             # defenders decay over time
-            dState.rState.count *= dState.decayRate
+            count[dState.rState.index] *= dState.decayRate
         
         # process all army fights
         for aState in self.adversaries.values():
             dState = self.defendersByCategory[aState.info.category]
             
-            totalDefenders = dState.rState.count
+            totalDefenders = count[dState.rState.index]
             totalAttackers = aState.strength
                     
             totalArmies = totalDefenders + totalAttackers
@@ -338,11 +435,11 @@ class GameState:
             activeFighters = min(activeFighters, totalAttackers)
             activeFighters = min(activeFighters, totalDefenders)
             
-            dState.rState.count -= activeFighters
+            count[dState.rState.index] -= activeFighters
             aState.strength -= activeFighters
 
         for aState in self.adversaries.values():
-            totalDefenders = dState.rState.count
+            totalDefenders = count[dState.rState.index]
             totalAttackers = aState.strength
             totalArmies = totalDefenders + totalAttackers
             if totalArmies == 0:
@@ -351,97 +448,117 @@ class GameState:
                 aState.effectiveness = totalAttackers / totalArmies
             
     def step(self):
-        self.updateStorageAndProcessors()
-        self.updateIncomeAndBuildingProduction()
+        # a single tick is a bulk advance of one tick, so n calls to step() and advance(n) are identical
+        self.advance(1)
+
+    def advance(self, tickCount : int, tickCallback : Callable[[], None] = None):
+        # runs tickCount ticks in a tight loop. work that cannot change between ticks is hoisted out
+        # of the loop: storage and processor allocation only change through player actions and
+        # modifier changes, which mark dirty.storage, and ideology ranks only change when programs run.
+        # tickCallback, if given, is called after every tick, e.g. to watch values while fast-forward
+        # looks for a cycle.
+        if len(self.actions.pending) > 0:
+            self.actions.applyPending()
+        if tickCount <= 0:
+            return
         
-        if self.ticksUntilProcessorCycle > 0:
-            self.ticksUntilProcessorCycle -= 1
-        else:
-            self.runAllPrograms()
-            self.ticksUntilProcessorCycle = self.database.params.ticksPerProcessorCycle
+        self.updateStorageIfDirty()
         
-        self.updateProjectPayments()
-
-        if self.ticksUntilArmyCycle > 0:
-            self.ticksUntilArmyCycle -= 1
-        else:
-            self.updateArmies()
-            self.ticksUntilArmyCycle = self.database.params.ticksPerProcessorCycle
+        ledger = self.ledger
+        eventManager = self.eventManager
+        ticksPerProcessorCycle = self.params.ticksPerProcessorCycle
+        ideologies = list(self.ideologies.values())
+        ranksDirty = True
         
-        # cap all resources to their storage capacity
-        for rState in self.resources.values():
-            rState.count = min(rState.count, rState.storage)
+        for i in range(0, tickCount):
+            self.updateIncomeAndBuildingProduction()
             
-        for iState in self.ideologies.values():
-            ModifierManager.updateIdeologyRank(self, iState)
+            if self.ticksUntilProcessorCycle > 0:
+                self.ticksUntilProcessorCycle -= 1
+            else:
+                self.runAllPrograms()
+                self.ticksUntilProcessorCycle = ticksPerProcessorCycle
+                ranksDirty = True
             
-        self.eventManager.step()
-        
-        self.ticks += 1
+            self.updateProjectPayments()
+
+            if self.ticksUntilArmyCycle > 0:
+                self.ticksUntilArmyCycle -= 1
+            else:
+                self.updateArmies()
+                self.ticksUntilArmyCycle = ticksPerProcessorCycle
+            
+            # cap all resources to their storage capacity
+            ledger.clampToStorage()
+            
+            if ranksDirty:
+                for iState in ideologies:
+                    ModifierManager.updateIdeologyRank(self, iState)
+                ranksDirty = False
+                if self.modifiers.hasIdeologySources:
+                    self.updateModifiers()
+
+            # a completed project or a new ideology rank can change storage modifiers. the new storage
+            # applies from the next tick, as it would with a separate step() per tick.
+            self.updateStorageIfDirty()
+                
+            eventManager.step()
+            
+            self.ticks += 1
+            if tickCallback is not None:
+                tickCallback()
+    
+    def fastForward(self, tickCount : int):
+        # same as advance(), but steady-state stretches are integrated in closed form. use this for
+        # high speeds and offline catch-up; results match advance() up to floating-point rounding.
+        self.fastForwarder.advance(tickCount)
     
     def completeProject(self, projectName : str):
         pState = self.projects[projectName]
         pState.purchaseCount += 1
         pState.progress = 0
         self.dirty.projects = True
+        self.updateModifiers()
     
     def getBuildingProduction(self, buildingName : str) -> ResourceList:
         b = self.buildings[buildingName]
         
-        prod: Dict[str, float] = {}
-        for rName, production in b.info.production.items():
-            prod[rName] = production
-            
-        return ResourceList(prod)
+        return ResourceList(dict(self.modifiers.buildingProduction[b.info.name]))
 
     def getBuildingUpkeep(self, buildingName : str) -> ResourceList:
         b = self.buildings[buildingName]
         
-        upkeep: Dict[str, float] = {}
-        costMultiplier = 1.0
-        for rName, upkeepCost in b.info.upkeep.items():
-            upkeep[rName] = upkeepCost * costMultiplier
-            
-        return ResourceList(upkeep)
+        return ResourceList(dict(self.modifiers.buildingUpkeep[b.info.name]))
     
+    # costs are cached, and the returned ResourceLists are shared and must not be modified
     def getProjectCost(self, projectName : str) -> float:
-        return ModifierManager.getProjectCost(self, projectName)
+        return self.costCache.getProjectCost(projectName)
         
     def getBuildingCost(self, buildingName : str) -> ResourceList:
-        return ModifierManager.getBuildingCost(self, buildingName)
+        return self.costCache.getBuildingCost(buildingName)
     
     def getResearchCost(self, researchName : str) -> ResourceList:
-        r = self.research[researchName]
-        
-        costs: Dict[str, float] = {}
-        costMultiplier = 1.0
-        for resourceName, resourceCost in r.info.cost.items():
-            costs[resourceName] = math.floor(resourceCost * costMultiplier)
-            
-        return ResourceList(costs)
+        return self.costCache.getResearchCost(researchName)
     
     def getCommandCost(self, commandName : str) -> ResourceList:
-        c = self.commands[commandName]
-        
-        costs: Dict[str, float] = {}
-        costMultiplier = 1.0
-        for rName, baseCost in c.info.cost.items():
-            costs[rName] = baseCost * costMultiplier
-            
-        return ResourceList(costs)
+        return self.costCache.getCommandCost(commandName)
     
     def canAffordCost(self, cost : ResourceList) -> bool:
+        count = self.ledger.count
+        resourceIndex = self.ledger.resourceIndex
         for r, v in cost.r.items():
-            if v > self.resources[r].count:
+            if v > count[resourceIndex[r]]:
                 return False
         return True
 
     def spendResources(self, resourceList : ResourceList):
+        count = self.ledger.count
+        resourceIndex = self.ledger.resourceIndex
         for r, v in resourceList.r.items():
-            if v > self.resources[r].count:
+            if v > count[resourceIndex[r]]:
                 print('cannot afford cost')
                 return
-            self.resources[r].count -= v
+            count[resourceIndex[r]] -= v
 
     def attemptPurchaseBuilding(self, buildingName):
         buildingCost = self.getBuildingCost(buildingName)
@@ -450,9 +567,9 @@ class GameState:
             return
         
         self.spendResources(buildingCost)
-        self.buildings[buildingName].totalCount += 1
-        self.buildings[buildingName].activeCount += 1
-        self.updateStorageAndProcessors()
+        bState = self.buildings[buildingName]
+        bState.totalCount += 1
+        self.changeActiveCount(bState, bState.activeCount + 1)
         
     def attemptPurchaseResearch(self, researchName):
         researchCost = self.getResearchCost(researchName)
@@ -463,31 +580,117 @@ class GameState:
         self.spendResources(researchCost)
         self.research[researchName].purchased = True
         self.purchasedResearch.add(researchName)
-        self.updateStorageAndProcessors()
+        self.updateModifiers()
+        
+    def modifyBuildingActive(self, buildingName : str, deltaValue : int):
+        bState = self.buildings[buildingName]
+        activeCount = max(bState.activeCount + deltaValue, 0)
+        activeCount = min(activeCount, bState.totalCount)
+        self.changeActiveCount(bState, activeCount)
+        
+    def removeBuilding(self, buildingName : str):
+        bState = self.buildings[buildingName]
+        bState.totalCount = max(bState.totalCount - 1, 0)
+        self.changeActiveCount(bState, min(bState.activeCount, bState.totalCount))
+        
+    def setAssignedProcessors(self, programIndex : int, assignedProcessors : int):
+        program = self.programs[programIndex]
+        available = program.assignedProcessors + self.freeProcessorCount
+        program.assignedProcessors = max(0, min(assignedProcessors, available))
+        self.updateProcessorAllocation()
+
+    def restartAllPrograms(self):
+        for program in self.programs:
+            program.resetAllCommands()
+
+    def addCommandToProgram(self, programIndex : int, commandName : str):
+        self.programs[programIndex].commands.append(GameCommand(self.commands[commandName].info))
+
+    def reorderProgram(self, programIndex : int, order : List[int]):
+        # order lists the indices of the commands to keep in their new order, commands left out are removed
+        program = self.programs[programIndex]
+        program.commands = [program.commands[i] for i in order]
+        program.resetAllCommands()
+
+    def changeCommandMaxCount(self, programIndex : int, commandIndex : int, deltaValue : int):
+        command = self.programs[programIndex].commands[commandIndex]
+        command.maxCount = max(min(command.maxCount + deltaValue, 1000), 1)
+        command.count = 0
+
+    def modifyProjectPayment(self, projectName : str, resourceName : str, deltaValue : float):
+        pState = self.projects[projectName]
+        pState.resourcePayments[resourceName] = max(0, pState.resourcePayments[resourceName] + deltaValue)
+
+    def restoreProject(self, projectName : str, purchaseCount : int, progress : float):
+        # sets a project back to an earlier purchase count and progress, e.g. a project that lasts
+        # through time travel
+        pState = self.projects[projectName]
+        pState.purchaseCount = purchaseCount
+        pState.progress = progress
+        self.updateModifiers()
+        self.dirty.projects = True
+
+    def chooseEventOption(self, eventName : str, option : str):
+        self.processEventOption(self.events[eventName], option)
+
+    def markEventDisplayed(self, eventName : str):
+        # the UI showed the event, so it is not shown again
+        self.events[eventName].displayed = True
         
     def checkResearch(self, rName : str) -> bool:
         if not rName in self.research:
             print('research not found', rName)
         return rName in self.purchasedResearch
         
-    def runCommand(self, commandName):
+    def getAffordableRepeats(self, cost : ResourceList, production : Dict[str, float], repeat : int) -> int:
+        # number of back-to-back runs, at most repeat, that can each afford cost when every run also
+        # adds production. a run that cannot be afforded changes nothing, so every later run fails too.
+        count = self.ledger.count
+        resourceIndex = self.ledger.resourceIndex
+        runs = repeat
+        for rName, v in cost.r.items():
+            available = count[resourceIndex[rName]]
+            if available < v:
+                return 0
+            net = production.get(rName, 0.0) - v
+            if net >= 0.0:
+                continue
+            runs = min(runs, math.floor((available - v) / -net) + 1)
+
+        # guard against rounding in the division so the result matches the one at a time check
+        for rName, v in cost.r.items():
+            available = count[resourceIndex[rName]]
+            net = production.get(rName, 0.0) - v
+            while runs > 0 and available + (runs - 1) * net < v:
+                runs -= 1
+        return runs
+
+    def runCommand(self, commandName, repeat : int = 1) -> int:
+        # runs the command up to repeat times in a row, stopping at the first run that cannot be
+        # afforded, and applies all runs at once. returns the number of runs.
         cState : CommandState = self.commands[commandName]
         cInfo = cState.info
         
         commandCost = self.getCommandCost(commandName)
-        if not self.canAffordCost(commandCost):
-            return
-        self.spendResources(commandCost)
+        production = self.modifiers.commandProduction[commandName]
+        runs = self.getAffordableRepeats(commandCost, production, repeat)
+        if runs == 0:
+            return 0
+        
+        count = self.ledger.count
+        resourceIndex = self.ledger.resourceIndex
+        for rName, v in commandCost.r.items():
+            count[resourceIndex[rName]] -= v * runs
             
-        for rName, v in cInfo.production.items():
-            r = self.resources[rName]
-            r.count += v
+        for rName, v in production.items():
+            count[resourceIndex[rName]] += v * runs
             
         for iName, v in cInfo.ideology.items():
             i = self.ideologies[iName]
-            i.totalScore += v
+            i.totalScore += v * runs
+        return runs
             
-    def processEventOption(self, eState : EventState, option : Str):
+    def processEventOption(self, eState : EventState, option : str):
         eInfo = eState.info
         
         # ongoing events don't have options.
@@ -519,9 +722,11 @@ class GameState:
         
 
 if __name__ == "__main__":
+    # run as python -m game.core.gameState from the repository root. headless.py is the full runner.
     print('testing game state')
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    database = GameDatabase('gameDatabase.json')
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    database = GameDatabase('database/gameData')
     state = GameState(database)
     for i in range(0, 10):
-        state.step()
\ No newline at end of file
+        state.step()
+    print('ticks', state.ticks)
\ No newline at end of file
@@ -0,0 +1,134 @@
+
+from __future__ import annotations
+
+import json
+from typing import Callable, List, TextIO
+
+from game.core.actionQueue import ActionQueue, GameAction
+
+class SimulationScript:
+    # a scripted playthrough for headless runs, read from json:
+    #   programs: [{"processors": n, "commands": [[commandName, maxCount], ...]}, ...] set up at the start
+    #   buildOrder: [buildingOrResearchName, ...] each bought as soon as it is affordable, in order
+    #   buildCheckTicks: how often the next build order entry is checked, 10 ticks by default
+    #   actions: [[tick, actionName, [args]], ...] applied on the given tick, see ActionQueue.actionNames
+    def __init__(self, data : dict):
+        self.programs: List[dict] = data.get('programs', [])
+        self.buildOrder: List[str] = data.get('buildOrder', [])
+        self.buildCheckTicks: int = max(1, int(data.get('buildCheckTicks', 10)))
+        self.actions: List[GameAction] = sorted((GameAction(int(a[0]), a[1], tuple(a[2])) for a in data.get('actions', [])), key=lambda a: a.tick)
+        for action in self.actions:
+            if not action.name in ActionQueue.actionNames:
+                raise ValueError(f"Unknown action {action.name}")
+
+    @staticmethod
+    def load(filePath : str) -> SimulationScript:
+        with open(filePath, 'r') as file:
+            return SimulationScript(json.load(file))
+
+class HeadlessRunner:
+    # runs a state without any UI. the state is advanced in bulk up to the next scripted action,
+    # build order check or sample, with fastForward unless exact is set.
+    def __init__(self, state : GameState, script : SimulationScript = None, exact : bool = False):
+        self.state = state
+        self.script = script if script is not None else SimulationScript({})
+        self.advance = state.advance if exact else state.fastForward
+        self.nextAction = 0
+        self.nextBuild = 0
+        self.nextBuildCheck = state.ticks
+
+        actions = state.actions
+        for programIndex, program in enumerate(self.script.programs):
+            for commandIndex, (cName, maxCount) in enumerate(program.get('commands', [])):
+                actions.submit('addCommandToProgram', programIndex, cName)
+                actions.submit('changeCommandMaxCount', programIndex, commandIndex, maxCount - 1)
+            if 'processors' in program:
+                actions.submit('setAssignedProcessors', programIndex, program['processors'])
+        actions.applyPending()
+
+    def run(self, tickCount : int, sampleInterval : int, sampleCallback : Callable[[GameState], None] = None,
+            actionCallback : Callable[[GameState], None] = None):
+        # advances tickCount ticks. sampleCallback is called with the state every sampleInterval
+        # ticks, starting with the current tick. actionCallback is called whenever the run stops to
+        # apply scripted actions or check the build order, after they were applied.
+        state = self.state
+        script = self.script
+        endTick = state.ticks + tickCount
+        nextSample = state.ticks
+        while True:
+            if state.ticks >= nextSample:
+                if sampleCallback is not None:
+                    sampleCallback(state)
+                nextSample += sampleInterval
+            if state.ticks >= endTick:
+                break
+
+            while self.nextAction < len(script.actions) and script.actions[self.nextAction].tick <= state.ticks:
+                action = script.actions[self.nextAction]
+                state.actions.submit(action.name, *action.args)
+                self.nextAction += 1
+            if state.ticks >= self.nextBuildCheck:
+                self.checkBuildOrder()
+                self.nextBuildCheck = state.ticks + script.buildCheckTicks
+            state.actions.applyPending()
+            if actionCallback is not None:
+                actionCallback(state)
+
+            target = min(endTick, nextSample)
+            if self.nextAction < len(script.actions):
+                target = min(target, script.actions[self.nextAction].tick)
+            if self.nextBuild < len(script.buildOrder):
+                target = min(target, self.nextBuildCheck)
+            self.advance(max(1, target - state.ticks))
+
+    def checkBuildOrder(self):
+        # buys build order entries while they are affordable
+        state = self.state
+        buildOrder = self.script.buildOrder
+        while self.nextBuild < len(buildOrder):
+            name = buildOrder[self.nextBuild]
+            if name in state.buildings:
+                if not state.canAffordCost(state.getBuildingCost(name)):
+                    return
+                state.actions.submit('attemptPurchaseBuilding', name)
+            elif name in state.research:
+                if not state.canAffordCost(state.getResearchCost(name)):
+                    return
+                state.actions.submit('attemptPurchaseResearch', name)
+            else:
+                raise ValueError(f"Build order entry {name} is not a building or research")
+            state.actions.applyPending()
+            self.nextBuild += 1
+
+class SampleWriter:
+    # writes one row per sample: resource counts and income, ideology scores and adversary strength
+    def __init__(self, file : TextIO, format : str):
+        if not format in ('csv', 'ndjson'):
+            raise ValueError(f"Unknown format {format}")
+        self.file = file
+        self.format = format
+        self.headerWritten = False
+
+    def write(self, state : GameState):
+        if self.format == 'ndjson':
+            row = {
+                'tick': state.ticks,
+                'resources': {r.info.name: {'count': r.count, 'income': r.income} for r in state.resources.values()},
+                'ideologies': {i.info.name: i.totalScore for i in state.ideologies.values()},
+                'adversaries': {a.info.name: a.strength for a in state.adversaries.values()}
+            }
+            self.file.write(json.dumps(row, separators=(',', ':')) + '\n')
+            return
+
+        if not self.headerWritten:
+            columns = ['tick']
+            columns += [f'{rName} count,{rName} income' for rName in state.resources.keys()]
+            columns += [f'{iName} score' for iName in state.ideologies.keys()]
+            columns += [f'{aName} strength' for aName in state.adversaries.keys()]
+            self.file.write(','.join(columns) + '\n')
+            self.headerWritten = True
+        values = [str(state.ticks)]
+        values += [f'{r.count!r},{r.income!r}' for r in state.resources.values()]
+        values += [repr(i.totalScore) for i in state.ideologies.values()]
+        values += [repr(a.strength) for a in state.adversaries.values()]
+        self.file.write(','.join(values) + '\n')
@@ -1,6 +1,5 @@
 
 from __future__ import annotations
-from ast import Str
 
 import json
 import os
@@ -9,7 +8,7 @@ from typing import Dict, List, NamedTuple
 from game.core.gameProgram import GameProgram, GameCommand
 
 from game.database.gameDatabase import (ResourceList, GameDatabase, CommandInfo,
-    ResourceInfo, BuildingInfo, EventInfo, ResearchInfo, ProjectInfo)
+    ResourceInfo, BuildingInfo, EventInfo, ResearchInfo, ProjectInfo, ModifierSource)
 from game.core.eventManager import EventManager
 
 class ModifierManager:
@@ -20,15 +19,28 @@ class ModifierManager:
         costs: Dict[str, float] = {}
         costMultiplier = pow(b.info.costScaling, b.totalCount)
         
+        multipliers = state.modifiers.buildingCostMultipliers[buildingName]
         for resourceName, baseCost in b.info.baseCost.items():
-            rScaleFactor = 1.0
-            if resourceName == 'Regolith' and state.checkResearch('Efficient Building Design'):
-                rScaleFactor *= 0.9
-
+            rScaleFactor = multipliers.get(resourceName, 1.0)
             costs[resourceName] = math.floor(baseCost * costMultiplier * rScaleFactor)
             
         return ResourceList(costs)
     
+    @staticmethod
+    def getResearchCost(state : GameState, researchName : str) -> ResourceList:
+        r = state.research[researchName]
+        
+        costs: Dict[str, float] = {}
+        costMultiplier = 1.0
+        for resourceName, resourceCost in r.info.cost.items():
+            costs[resourceName] = math.floor(resourceCost * costMultiplier)
+            
+        return ResourceList(costs)
+    
+    @staticmethod
+    def getCommandCost(state : GameState, commandName : str) -> ResourceList:
+        return ResourceList(dict(state.modifiers.commandCost[commandName]))
+    
     def getProjectCost(state : GameState, projectName : str) -> float:
         pState = state.projects[projectName]
         info = pState.info
@@ -53,3 +65,73 @@ class ModifierManager:
         iState.localRankScore = s
         if iState.totalScore < 0.0:
             iState.rank = -iState.rank
+
+class ModifierTables:
+    # effective costs, production, upkeep and storage with all active modifiers applied. the
+    # database compiles every modifier into per-name, per-resource multipliers. a source's level
+    # is 1 for purchased research, the purchase count of a project and the rank of an ideology,
+    # and the tables are only rebuilt when one of those levels changes.
+    def __init__(self, state : GameState, tablesFrom : ModifierTables = None):
+        # tablesFrom shares the tables of another state. rebuild replaces every table rather than
+        # changing them in place, so shared tables are never modified.
+        self.state = state
+        self.sources: List[ModifierSource] = state.database.modifierSources
+        self.hasIdeologySources: bool = any(source.kind == 'ideology' for source in self.sources)
+        if tablesFrom is None:
+            self.rebuild([0] * len(self.sources))
+            return
+        self.levels: List[int] = tablesFrom.levels
+        self.buildingCostMultipliers = tablesFrom.buildingCostMultipliers
+        self.buildingProduction = tablesFrom.buildingProduction
+        self.buildingUpkeep = tablesFrom.buildingUpkeep
+        self.buildingStorage = tablesFrom.buildingStorage
+        self.commandCost = tablesFrom.commandCost
+        self.commandProduction = tablesFrom.commandProduction
+
+    def sourceLevel(self, source : ModifierSource) -> int:
+        if source.kind == 'research':
+            return 1 if source.name in self.state.purchasedResearch else 0
+        if source.kind == 'project':
+            return self.state.projects[source.name].purchaseCount
+        return self.state.ideologies[source.name].rank
+
+    def refresh(self) -> bool:
+        # returns True if the tables changed
+        levels = [self.sourceLevel(source) for source in self.sources]
+        if levels == self.levels:
+            return False
+        self.rebuild(levels)
+        return True
+
+    def rebuild(self, levels : List[int]):
+        database = self.state.database
+        self.levels: List[int] = levels
+
+        # costs scale with the purchase count, so buildings keep multipliers rather than values
+        self.buildingCostMultipliers: Dict[str, Dict[str, float]] = {bName: {} for bName in database.buildings.keys()}
+        self.buildingProduction: Dict[str, Dict[str, float]] = {bName: dict(bInfo.production) for bName, bInfo in database.buildings.items()}
+        self.buildingUpkeep: Dict[str, Dict[str, float]] = {bName: dict(bInfo.upkeep) for bName, bInfo in database.buildings.items()}
+        self.buildingStorage: Dict[str, Dict[str, float]] = {bName: dict(bInfo.storage) for bName, bInfo in database.buildings.items()}
+        self.commandCost: Dict[str, Dict[str, float]] = {cName: dict(cInfo.cost) for cName, cInfo in database.commands.items()}
+        self.commandProduction: Dict[str, Dict[str, float]] = {cName: dict(cInfo.production) for cName, cInfo in database.commands.items()}
+
+        tables = {
+            'buildingCost': self.buildingCostMultipliers,
+            'buildingProduction': self.buildingProduction,
+            'buildingUpkeep': self.buildingUpkeep,
+            'buildingStorage': self.buildingStorage,
+            'commandCost': self.commandCost,
+            'commandProduction': self.commandProduction
+        }
+        for source, level in zip(self.sources, levels):
+            if level == 0:
+                continue
+            for target, multipliersByName in source.multipliers.items():
+                table = tables[target]
+                for name, multipliers in multipliersByName.items():
+                    values = table[name]
+                    for rName, multiplier in multipliers.items():
+                        if target == 'buildingCost':
+                            values[rName] = values.get(rName, 1.0) * math.pow(multiplier, level)
+                        elif rName in values:
+                            values[rName] *= math.pow(multiplier, level)
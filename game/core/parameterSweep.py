@@ -0,0 +1,176 @@
+
+from __future__ import annotations
+
+import copy
+import itertools
+import os
+import random
+import sys
+import time
+from typing import Dict, List, NamedTuple, TextIO, Tuple
+
+from game.database.gameDatabase import GameDatabase, GameParams
+from game.core.gameState import GameState
+from game.core.headlessRunner import HeadlessRunner, SimulationScript
+
+# what-if runs over the balancing constants in GameParams. every sweep point is a dict of
+# overrides, keyed by the GameParams attribute name, or attribute.entry for the starting tables,
+# e.g. {'armyFightRatio': 0.02, 'startingResources.Credits': 2000.0}. the points are run as
+# headless runs in a process pool and each run reports a row of metrics.
+
+def applyOverrides(params : GameParams, overrides : Dict[str, object]):
+    # derived parameters are recomputed from the overridden ones, unless they are overridden as well
+    for key, value in overrides.items():
+        if not key in GameParams.derivedParameters:
+            setParameter(params, key, value)
+    params.updateDerived()
+    for key, value in overrides.items():
+        if key in GameParams.derivedParameters:
+            setParameter(params, key, value)
+
+def setParameter(params : GameParams, key : str, value : object):
+    name, _, entry = key.partition('.')
+    if not hasattr(params, name):
+        raise ValueError(f"Unknown parameter {name}")
+    if entry:
+        table = getattr(params, name)
+        if not isinstance(table, dict) or not entry in table:
+            raise ValueError(f"Unknown parameter {key}")
+        table[entry] = value
+    else:
+        setattr(params, name, value)
+
+def gridPoints(grid : Dict[str, List]) -> List[Dict[str, object]]:
+    # every combination of the listed values
+    keys = list(grid.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+def randomPoints(ranges : Dict[str, Tuple], count : int, seed : int = None) -> List[Dict[str, object]]:
+    # count points drawn uniformly from the (low, high) ranges. ranges with integer bounds draw integers.
+    rng = random.Random(seed)
+    points = []
+    for i in range(0, count):
+        point = {}
+        for key, (low, high) in ranges.items():
+            if isinstance(low, int) and isinstance(high, int):
+                point[key] = rng.randint(low, high)
+            else:
+                point[key] = rng.uniform(low, high)
+        points.append(point)
+    return points
+
+class SweepMetrics:
+    # the first tick each of firstBuildings was owned, and the peak count of each of peakResources.
+    # purchases only happen when the runner stops to apply actions, so checking the buildings then
+    # gives exact ticks. peaks are only as precise as the sample interval of the run.
+    def __init__(self, firstBuildings : List[str], peakResources : List[str]):
+        self.firstTicks: Dict[str, int] = {bName: None for bName in firstBuildings}
+        self.peaks: Dict[str, float] = {rName: 0.0 for rName in peakResources}
+
+    @staticmethod
+    def columns(firstBuildings : List[str], peakResources : List[str]) -> List[str]:
+        return [f'first {bName}' for bName in firstBuildings] + [f'peak {rName}' for rName in peakResources]
+
+    def checkBuildings(self, state : GameState):
+        for bName, tick in self.firstTicks.items():
+            if tick is None and state.buildings[bName].totalCount > 0:
+                self.firstTicks[bName] = state.ticks
+
+    def sample(self, state : GameState):
+        self.checkBuildings(state)
+        for rName in self.peaks.keys():
+            self.peaks[rName] = max(self.peaks[rName], state.resources[rName].count)
+
+    def values(self) -> List:
+        return list(self.firstTicks.values()) + list(self.peaks.values())
+
+class SweepResult(NamedTuple):
+    index: int
+    overrides: Dict[str, object]
+    metrics: List # in the order of SweepMetrics.columns
+    seconds: float
+
+class SweepSettings(NamedTuple):
+    scriptData: dict
+    ticks: int
+    sampleInterval: int
+    firstBuildings: List[str]
+    peakResources: List[str]
+    exact: bool
+
+# set once per worker process by initWorker, so the database is only sent to each worker once
+workerDatabase: GameDatabase = None
+workerParams: GameParams = None
+workerSettings: SweepSettings = None
+
+def initWorker(database : GameDatabase, settings : SweepSettings):
+    global workerDatabase, workerParams, workerSettings
+    workerDatabase = database
+    workerParams = database.params
+    workerSettings = settings
+    # the game prints as events trigger
+    sys.stdout = open(os.devnull, 'w')
+
+def runPoint(index : int, overrides : Dict[str, object]) -> SweepResult:
+    startTime = time.perf_counter()
+    settings = workerSettings
+    params = copy.deepcopy(workerParams)
+    applyOverrides(params, overrides)
+    workerDatabase.params = params
+
+    state = GameState(workerDatabase)
+    runner = HeadlessRunner(state, SimulationScript(settings.scriptData), settings.exact)
+    metrics = SweepMetrics(settings.firstBuildings, settings.peakResources)
+    runner.run(settings.ticks, settings.sampleInterval, metrics.sample, metrics.checkBuildings)
+    return SweepResult(index, overrides, metrics.values(), time.perf_counter() - startTime)
+
+def runSweep(database : GameDatabase, points : List[Dict[str, object]], settings : SweepSettings,
+             workerCount : int = None) -> List[SweepResult]:
+    # runs every point in a pool of workerCount processes, all cores by default. results are in point order.
+    for bName in settings.firstBuildings:
+        if not bName in database.buildings:
+            raise ValueError(f"Unknown building {bName}")
+    for rName in settings.peakResources:
+        if not rName in database.resources:
+            raise ValueError(f"Unknown resource {rName}")
+    # fail here rather than in a worker
+    for overrides in points:
+        applyOverrides(copy.deepcopy(database.params), overrides)
+
+    # imported here since it is slow to import and only the process running the sweep needs it
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workerCount, initializer=initWorker, initargs=(database, settings)) as executor:
+        results = list(executor.map(runPoint, range(0, len(points)), points))
+    return sorted(results, key=lambda r: r.index)
+
+def writeTable(results : List[SweepResult], settings : SweepSettings, file : TextIO, format : str):
+    # one row per sweep point with its overrides and metrics, as csv or as an aligned text table
+    if not format in ('csv', 'table'):
+        raise ValueError(f"Unknown format {format}")
+    overrideKeys = []
+    for result in results:
+        for key in result.overrides.keys():
+            if not key in overrideKeys:
+                overrideKeys.append(key)
+    columns = ['run'] + overrideKeys + SweepMetrics.columns(settings.firstBuildings, settings.peakResources) + ['seconds']
+
+    def formatValue(value) -> str:
+        if value is None:
+            return '' if format == 'csv' else '-'
+        if isinstance(value, float):
+            return repr(value) if format == 'csv' else f'{value:.6g}'
+        return str(value)
+
+    rows = []
+    for result in results:
+        values = [result.index] + [result.overrides.get(key) for key in overrideKeys] + result.metrics + [result.seconds]
+        rows.append([formatValue(v) for v in values])
+
+    if format == 'csv':
+        for row in [columns] + rows:
+            file.write(','.join(row) + '\n')
+        return
+
+    widths = [max(len(row[i]) for row in [columns] + rows) for i in range(0, len(columns))]
+    for row in [columns] + rows:
+        file.write('  '.join(value.rjust(width) for value, width in zip(row, widths)) + '\n')
@@ -0,0 +1,237 @@
+
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Dict, List, Tuple
+
+from game.database.gameDatabase import GameDatabase
+
+# numpy is optional. When it is available the per-tick accounting runs as vector operations
+# over the ledger arrays, otherwise the same arrays are walked with plain python loops. it is
+# imported when the first ledger is built rather than with this module, so importing the core
+# stays cheap for tools that never build a GameState.
+np = None
+numpyLoaded = False
+
+def loadNumpy():
+    global np, numpyLoaded
+    if numpyLoaded:
+        return
+    numpyLoaded = True
+    try:
+        import numpy
+        np = numpy
+    except ImportError:
+        np = None
+
+class BuildingSegment:
+    # buildings are processed in database order. consecutive buildings without upkeep are grouped
+    # into a single block that can be applied with one matrix product, while each building with
+    # upkeep gets its own segment because its production depends on affording the upkeep.
+    def __init__(self, start : int, end : int, hasUpkeep : bool):
+        self.start: int = start
+        self.end: int = end
+        self.hasUpkeep: bool = hasUpkeep
+        self.production = None # numpy matrix for blocks, only used when numpy is available
+
+class ResourceLedger:
+    def __init__(self, database : GameDatabase, tablesFrom : ResourceLedger = None):
+        # tablesFrom shares the building tables of another ledger instead of building them again.
+        # the tables are only ever replaced as a whole by setBuildingTables, so sharing is safe.
+        params = database.params
+
+        # every resource gets a fixed index in database order
+        self.resourceNames: List[str] = list(database.resources.keys())
+        self.resourceIndex: Dict[str, int] = {}
+        for i, rName in enumerate(self.resourceNames):
+            self.resourceIndex[rName] = i
+
+        self.buildingNames: List[str] = list(database.buildings.keys())
+        self.buildingIndex: Dict[str, int] = {}
+        for i, bName in enumerate(self.buildingNames):
+            self.buildingIndex[bName] = i
+
+        resourceCount = len(self.resourceNames)
+        buildingCount = len(self.buildingNames)
+
+        # contiguous float64 arrays; numpy views below share the same memory
+        self.count = array('d', [0.0] * resourceCount)
+        self.income = array('d', [0.0] * resourceCount)
+        self.storage = array('d', [0.0] * resourceCount)
+        self.startingStorage = array('d', [float(params.startingStorage[rName]) for rName in self.resourceNames])
+
+        # active building counts, indexed by building
+        self.activeCounts = array('q', [0] * buildingCount)
+
+        loadNumpy()
+        self.vectorized = np is not None
+        if self.vectorized:
+            self.countV = np.frombuffer(self.count, dtype=np.float64)
+            self.incomeV = np.frombuffer(self.income, dtype=np.float64)
+            self.storageV = np.frombuffer(self.storage, dtype=np.float64)
+            self.startingStorageV = np.frombuffer(self.startingStorage, dtype=np.float64)
+            self.activeCountsV = np.frombuffer(self.activeCounts, dtype=np.int64)
+
+        if tablesFrom is not None:
+            self.shareBuildingTables(tablesFrom)
+            return
+
+        self.setBuildingTables(
+            {bName: bInfo.production for bName, bInfo in database.buildings.items()},
+            {bName: bInfo.upkeep for bName, bInfo in database.buildings.items()},
+            {bName: bInfo.storage for bName, bInfo in database.buildings.items()})
+
+    def setBuildingTables(self, production : Dict[str, Dict[str, float]], upkeep : Dict[str, Dict[str, float]], storage : Dict[str, Dict[str, float]]):
+        # per building production, upkeep and storage, with modifiers already applied
+        buildingCount = len(self.buildingNames)
+
+        # sparse rows of (resourceIndex, value), indexed by building
+        self.productionRows: List[List[Tuple[int, float]]] = []
+        self.upkeepRows: List[List[Tuple[int, float]]] = []
+        self.storageRows: List[List[Tuple[int, float]]] = []
+        for bName in self.buildingNames:
+            self.productionRows.append(self.makeRow(production[bName]))
+            self.upkeepRows.append(self.makeRow(upkeep[bName]))
+            self.storageRows.append(self.makeRow(storage[bName]))
+
+        # for buildings with upkeep: (resourceIndex, upkeep, net change per running unit)
+        self.upkeepNetRows: List[List[Tuple[int, float, float]]] = []
+        for bIndex in range(0, buildingCount):
+            production = dict(self.productionRows[bIndex])
+            self.upkeepNetRows.append([(rIndex, cost, production.get(rIndex, 0.0) - cost) for rIndex, cost in self.upkeepRows[bIndex]])
+
+        self.segments: List[BuildingSegment] = []
+        for bIndex in range(0, buildingCount):
+            hasUpkeep = len(self.upkeepRows[bIndex]) > 0
+            if not hasUpkeep and len(self.segments) > 0 and not self.segments[-1].hasUpkeep:
+                self.segments[-1].end = bIndex + 1
+            else:
+                self.segments.append(BuildingSegment(bIndex, bIndex + 1, hasUpkeep))
+
+        if self.vectorized:
+            self.productionMatrix = self.makeMatrix(self.productionRows)
+            self.upkeepMatrix = self.makeMatrix(self.upkeepRows)
+            self.storageMatrix = self.makeMatrix(self.storageRows)
+
+            for segment in self.segments:
+                if not segment.hasUpkeep:
+                    segment.production = self.productionMatrix[segment.start:segment.end]
+
+    def shareBuildingTables(self, ledger : ResourceLedger):
+        self.productionRows = ledger.productionRows
+        self.upkeepRows = ledger.upkeepRows
+        self.storageRows = ledger.storageRows
+        self.upkeepNetRows = ledger.upkeepNetRows
+        self.segments = ledger.segments
+        if self.vectorized:
+            self.productionMatrix = ledger.productionMatrix
+            self.upkeepMatrix = ledger.upkeepMatrix
+            self.storageMatrix = ledger.storageMatrix
+
+    def makeRow(self, values : Dict[str, float]) -> List[Tuple[int, float]]:
+        return [(self.resourceIndex[rName], float(v)) for rName, v in values.items()]
+
+    def makeMatrix(self, rows : List[List[Tuple[int, float]]]):
+        m = np.zeros((len(self.buildingNames), len(self.resourceNames)), dtype=np.float64)
+        for bIndex, row in enumerate(rows):
+            for rIndex, v in row:
+                m[bIndex, rIndex] = v
+        return m
+
+    def resetIncome(self):
+        if self.vectorized:
+            self.incomeV.fill(0.0)
+        else:
+            for i in range(0, len(self.income)):
+                self.income[i] = 0.0
+
+    def recomputeStorage(self):
+        if self.vectorized:
+            np.add(self.startingStorageV, self.activeCountsV @ self.storageMatrix, out=self.storageV)
+            return
+
+        self.storage[:] = self.startingStorage
+        for bIndex, row in enumerate(self.storageRows):
+            activeCount = self.activeCounts[bIndex]
+            if activeCount == 0:
+                continue
+            for rIndex, stor in row:
+                self.storage[rIndex] += activeCount * stor
+
+    def addBuildingStorage(self, bIndex : int, activeDelta : int):
+        # incremental update when the active count of a single building changes
+        for rIndex, stor in self.storageRows[bIndex]:
+            self.storage[rIndex] += activeDelta * stor
+
+    def applyProductionBlock(self, segment : BuildingSegment):
+        # production of a block of buildings without upkeep
+        if self.vectorized:
+            delta = self.activeCountsV[segment.start:segment.end] @ segment.production
+            self.incomeV += delta
+            self.countV += delta
+            return
+
+        for bIndex in range(segment.start, segment.end):
+            activeCount = self.activeCounts[bIndex]
+            if activeCount == 0:
+                continue
+            for rIndex, prod in self.productionRows[bIndex]:
+                self.income[rIndex] += prod * activeCount
+                self.count[rIndex] += prod * activeCount
+
+    def resolveUpkeepUnits(self, bIndex : int, activeCount : int) -> int:
+        # number of units of an upkeep building that can run this tick. units run one at a time
+        # and each unit must afford its upkeep, so this is the min over the upkeep resources of
+        # how many units the current count covers. a unit that fails changes nothing, so every
+        # later unit fails as well.
+        count = self.count
+        runnable = activeCount
+        for rIndex, cost, net in self.upkeepNetRows[bIndex]:
+            available = count[rIndex]
+            if available < cost:
+                return 0
+            if net >= 0.0:
+                continue
+            units = math.floor((available - cost) / -net) + 1
+            if units < runnable:
+                runnable = units
+
+        # guard against rounding in the division so the result matches the one at a time check
+        for rIndex, cost, net in self.upkeepNetRows[bIndex]:
+            while runnable > 0 and count[rIndex] + (runnable - 1) * net < cost:
+                runnable -= 1
+        return runnable
+
+    def applyUpkeepBuilding(self, segment : BuildingSegment):
+        # production of a single building with upkeep
+        bIndex = segment.start
+        activeCount = self.activeCounts[bIndex]
+        if activeCount == 0:
+            return
+        
+        count = self.count
+        income = self.income
+
+        # upkeep counts as negative income, whether or not it can be paid
+        for rIndex, cost in self.upkeepRows[bIndex]:
+            income[rIndex] -= cost * activeCount
+
+        runnable = self.resolveUpkeepUnits(bIndex, activeCount)
+        if runnable == 0:
+            return
+
+        for rIndex, cost in self.upkeepRows[bIndex]:
+            count[rIndex] -= cost * runnable
+        for rIndex, prod in self.productionRows[bIndex]:
+            income[rIndex] += prod * runnable
+            count[rIndex] += prod * runnable
+
+    def clampToStorage(self):
+        if self.vectorized:
+            np.minimum(self.countV, self.storageV, out=self.countV)
+            return
+
+        for i in range(0, len(self.count)):
+            if self.count[i] > self.storage[i]:
+                self.count[i] = self.storage[i]
@@ -0,0 +1,408 @@
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Callable, Dict, List
+
+from game.database.gameDatabase import GameDatabase
+from game.core.gameState import GameState
+from game.core.gameProgram import GameCommand
+from game.core.modifierManager import ModifierManager
+from game.core.actionQueue import ActionQueue, ActionJournal, GameAction
+
+class CatchUpSummary:
+    def __init__(self):
+        self.elapsedSeconds: float = 0.0 # wall-clock seconds since the save was written
+        self.ticks: int = 0 # ticks simulated to catch up
+        self.resourcesGained: Dict[str, float] = {} # change in count, only for resources that changed
+        self.eventsTriggered: List[str] = [] # events that triggered while the game was closed
+
+class SaveWriter:
+    # appends fixed-size fields, name tables and typed arrays to a buffer, always little-endian
+    def __init__(self):
+        self.data = bytearray()
+
+    def pack(self, fmt : str, *values):
+        self.data += struct.pack('<' + fmt, *values)
+
+    def names(self, names : List[str]):
+        encoded = '\n'.join(names).encode('utf-8')
+        self.pack('II', len(names), len(encoded))
+        self.data += encoded
+
+    def blob(self, data : bytes):
+        self.pack('I', len(data))
+        self.data += data
+
+    def array(self, typecode : str, values):
+        a = array(typecode, values)
+        if sys.byteorder == 'big':
+            a.byteswap()
+        self.pack('I', len(a))
+        self.data += a.tobytes()
+
+class SaveReader:
+    def __init__(self, data : bytes):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt : str):
+        values = struct.unpack_from('<' + fmt, self.data, self.offset)
+        self.offset += struct.calcsize('<' + fmt)
+        return values
+
+    def names(self) -> List[str]:
+        count, length = self.unpack('II')
+        encoded = bytes(self.data[self.offset : self.offset + length])
+        self.offset += length
+        return encoded.decode('utf-8').split('\n') if count > 0 else []
+
+    def blob(self) -> bytes:
+        length, = self.unpack('I')
+        data = bytes(self.data[self.offset : self.offset + length])
+        self.offset += length
+        return data
+
+    def array(self, typecode : str) -> array:
+        length, = self.unpack('I')
+        a = array(typecode)
+        end = self.offset + length * a.itemsize
+        a.frombytes(self.data[self.offset : end])
+        self.offset = end
+        if sys.byteorder == 'big':
+            a.byteswap()
+        return a
+
+class SaveManager:
+    # a save is a small header followed by one section per kind of database entry. each section
+    # starts with the entry names, followed by typed arrays of the dynamic values in that order,
+    # so saves survive entries being added, removed or reordered in the database.
+    saveMagic = b'HHSV'
+    saveVersion = 1
+
+    # a journal file is the start state of the journal as a save, followed by the action names,
+    # ticks and name indices, and the action args as json
+    journalMagic = b'HHJR'
+    journalVersion = 1
+
+    # the catch-up pass reports progress after each chunk of this many ticks
+    catchUpChunkTicks = 4096
+
+    @staticmethod
+    def save(state : GameState, filePath : str):
+        data = SaveManager.encode(state, time.time())
+        directory = os.path.dirname(filePath)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+        with open(filePath, 'wb') as file:
+            file.write(data)
+
+    @staticmethod
+    def encode(state : GameState, savedAt : float) -> bytes:
+        w = SaveWriter()
+        w.data += SaveManager.saveMagic
+        w.pack('Hdqqq', SaveManager.saveVersion, savedAt, state.ticks, state.ticksUntilProcessorCycle, state.ticksUntilArmyCycle)
+
+        commands = list(state.commands.values())
+        w.names([c.info.name for c in commands])
+        w.array('B', [c.unlocked for c in commands])
+
+        resources = list(state.resources.values())
+        resourceIndex = {rName: i for i, rName in enumerate(state.resources.keys())}
+        w.names([r.info.name for r in resources])
+        w.array('d', [r.count for r in resources])
+        w.array('B', [r.unlocked for r in resources])
+
+        buildings = list(state.buildings.values())
+        w.names([b.info.name for b in buildings])
+        w.array('q', [b.totalCount for b in buildings])
+        w.array('q', [b.activeCount for b in buildings])
+        w.array('B', [b.unlocked for b in buildings])
+
+        research = list(state.research.values())
+        w.names([r.info.name for r in research])
+        w.array('B', [r.purchased | (r.unlocked << 1) for r in research])
+
+        # project payments are flattened, with one payment count per project
+        projects = list(state.projects.values())
+        w.names([p.info.name for p in projects])
+        w.array('q', [p.purchaseCount for p in projects])
+        w.array('d', [p.progress for p in projects])
+        w.array('I', [len(p.resourcePayments) for p in projects])
+        w.array('I', [resourceIndex[rName] for p in projects for rName in p.resourcePayments.keys()])
+        w.array('d', [rPayment for p in projects for rPayment in p.resourcePayments.values()])
+
+        events = list(state.events.values())
+        eventIndex = {eName: i for i, eName in enumerate(state.events.keys())}
+        w.names([e.info.name for e in events])
+        w.array('B', [e.triggered | (e.completed << 1) | (e.ongoing << 2) | (e.displayed << 3) for e in events])
+        # timestamps repeat a lot, so each event stores an index into a table of the distinct ones,
+        # or 0 if it has none
+        timestamps = sorted(set(e.timestampStr for e in events if e.timestampStr is not None))
+        timestampIndex = {timestampStr: i + 1 for i, timestampStr in enumerate(timestamps)}
+        w.names(timestamps)
+        w.array('I', [timestampIndex.get(e.timestampStr, 0) for e in events])
+        w.array('I', [eventIndex[e.info.name] for e in state.activeEvents])
+        w.array('I', [eventIndex[e.info.name] for e in state.ongoingEvents])
+
+        ideologies = list(state.ideologies.values())
+        w.names([i.info.name for i in ideologies])
+        w.array('d', [i.totalScore for i in ideologies])
+
+        adversaries = list(state.adversaries.values())
+        w.names([a.info.name for a in adversaries])
+        w.array('B', [a.unlocked for a in adversaries])
+        w.array('d', [v for a in adversaries for v in
+            (a.strength, a.spawnRate, a.ticksToSurge, a.nextSurgeStrength, a.decayRate, a.effectiveness)])
+
+        defenders = list(state.defenders.values())
+        w.names([d.info.name for d in defenders])
+        w.array('B', [d.unlocked for d in defenders])
+        w.array('d', [d.decayRate for d in defenders])
+
+        # program commands are flattened, with one command count per program
+        commandIndex = {cName: i for i, cName in enumerate(state.commands.keys())}
+        w.array('q', [p.instructionPointer for p in state.programs])
+        w.array('q', [p.assignedProcessors for p in state.programs])
+        w.array('I', [len(p.commands) for p in state.programs])
+        w.array('I', [commandIndex[c.info.name] for p in state.programs for c in p.commands])
+        w.array('q', [c.count for p in state.programs for c in p.commands])
+        w.array('q', [c.maxCount for p in state.programs for c in p.commands])
+        return bytes(w.data)
+
+    @staticmethod
+    def readSave(filePath : str) -> bytes:
+        with open(filePath, 'rb') as file:
+            return file.read()
+
+    @staticmethod
+    def load(database : GameDatabase, filePath : str) -> GameState:
+        # loads the state as it was when saved. use catchUp to simulate the time since then.
+        state, savedAt = SaveManager.decode(database, SaveManager.readSave(filePath))
+        return state
+
+    @staticmethod
+    def matchNames(savedNames : List[str], entries : dict) -> list:
+        # the current entry for each saved name. entries missing from the database are None,
+        # and entries missing from the save keep their starting values.
+        return [entries.get(name) for name in savedNames]
+
+    @staticmethod
+    def decode(database : GameDatabase, data : bytes):
+        # returns the state and the time it was saved at
+        if data[:4] != SaveManager.saveMagic:
+            raise ValueError('Not a save file')
+        r = SaveReader(data)
+        r.offset = 4
+        version, savedAt, ticks, ticksUntilProcessorCycle, ticksUntilArmyCycle = r.unpack('Hdqqq')
+        if version != SaveManager.saveVersion:
+            raise ValueError(f'Unsupported save version {version}')
+
+        state = GameState(database)
+
+        commandNames = r.names()
+        for c, unlocked in zip(SaveManager.matchNames(commandNames, state.commands), r.array('B')):
+            if c is not None:
+                c.unlocked = bool(unlocked)
+
+        resourceNames = r.names()
+        resources = SaveManager.matchNames(resourceNames, state.resources)
+        for rState, count, unlocked in zip(resources, r.array('d'), r.array('B')):
+            if rState is not None:
+                rState.count = count
+                rState.unlocked = bool(unlocked)
+
+        buildings = SaveManager.matchNames(r.names(), state.buildings)
+        for bState, totalCount, activeCount, unlocked in zip(buildings, r.array('q'), r.array('q'), r.array('B')):
+            if bState is not None:
+                bState.totalCount = totalCount
+                bState.activeCount = activeCount
+                bState.unlocked = bool(unlocked)
+
+        state.purchasedResearch.clear()
+        research = SaveManager.matchNames(r.names(), state.research)
+        for rState, flags in zip(research, r.array('B')):
+            if rState is not None:
+                rState.purchased = bool(flags & 1)
+                rState.unlocked = bool(flags & 2)
+                if rState.purchased:
+                    state.purchasedResearch.add(rState.info.name)
+
+        projects = SaveManager.matchNames(r.names(), state.projects)
+        purchaseCounts, progress, paymentCounts = r.array('q'), r.array('d'), r.array('I')
+        paymentResources, paymentValues = r.array('I'), r.array('d')
+        paymentIndex = 0
+        for i, pState in enumerate(projects):
+            paymentEnd = paymentIndex + paymentCounts[i]
+            if pState is not None:
+                pState.purchaseCount = purchaseCounts[i]
+                pState.progress = progress[i]
+                for rIndex, rPayment in zip(paymentResources[paymentIndex:paymentEnd], paymentValues[paymentIndex:paymentEnd]):
+                    rName = resourceNames[rIndex]
+                    if rName in pState.resourcePayments:
+                        pState.resourcePayments[rName] = rPayment
+            paymentIndex = paymentEnd
+
+        events = SaveManager.matchNames(r.names(), state.events)
+        eventFlags = r.array('B')
+        timestamps = [None] + r.names()
+        for eState, flags, timestampIndex in zip(events, eventFlags, r.array('I')):
+            if eState is not None:
+                eState.triggered = bool(flags & 1)
+                eState.completed = bool(flags & 2)
+                eState.ongoing = bool(flags & 4)
+                eState.displayed = bool(flags & 8)
+                eState.timestampStr = timestamps[timestampIndex]
+        state.activeEvents = [events[i] for i in r.array('I') if events[i] is not None]
+        state.ongoingEvents = [events[i] for i in r.array('I') if events[i] is not None]
+        state.eventManager.rebuild()
+
+        ideologies = SaveManager.matchNames(r.names(), state.ideologies)
+        for iState, totalScore in zip(ideologies, r.array('d')):
+            if iState is not None:
+                iState.totalScore = totalScore
+
+        adversaries = SaveManager.matchNames(r.names(), state.adversaries)
+        unlocked, values = r.array('B'), r.array('d')
+        for i, aState in enumerate(adversaries):
+            if aState is not None:
+                aState.unlocked = bool(unlocked[i])
+                (aState.strength, aState.spawnRate, aState.ticksToSurge, aState.nextSurgeStrength,
+                    aState.decayRate, aState.effectiveness) = values[i * 6 : i * 6 + 6]
+
+        defenders = SaveManager.matchNames(r.names(), state.defenders)
+        for dState, unlocked, decayRate in zip(defenders, r.array('B'), r.array('d')):
+            if dState is not None:
+                dState.unlocked = bool(unlocked)
+                dState.decayRate = decayRate
+
+        instructionPointers, assignedProcessors, commandCounts = r.array('q'), r.array('q'), r.array('I')
+        commandIndices, counts, maxCounts = r.array('I'), r.array('q'), r.array('q')
+        commandIndex = 0
+        for i, program in enumerate(state.programs[:len(commandCounts)]):
+            commandEnd = commandIndex + commandCounts[i]
+            program.commands = []
+            for j in range(commandIndex, commandEnd):
+                cName = commandNames[commandIndices[j]]
+                if not cName in state.commands:
+                    continue
+                command = GameCommand(state.commands[cName].info)
+                command.count = counts[j]
+                command.maxCount = maxCounts[j]
+                program.commands.append(command)
+            program.instructionPointer = instructionPointers[i]
+            program.assignedProcessors = assignedProcessors[i]
+            commandIndex = commandEnd
+
+        state.ticks = ticks
+        state.ticksUntilProcessorCycle = ticksUntilProcessorCycle
+        state.ticksUntilArmyCycle = ticksUntilArmyCycle
+
+        # derived values are rebuilt rather than saved
+        for iState in state.ideologies.values():
+            ModifierManager.updateIdeologyRank(state, iState)
+        state.updateModifiers()
+        state.costCache.invalidate()
+        state.updateStorageAndProcessors()
+        state.dirty.events = True
+        state.dirty.projects = True
+        return state, savedAt
+
+    @staticmethod
+    def encodeJournal(database : GameDatabase, journal : ActionJournal) -> bytes:
+        start = GameState(database)
+        start.restore(journal.start)
+        w = SaveWriter()
+        w.data += SaveManager.journalMagic
+        w.pack('H', SaveManager.journalVersion)
+        w.blob(SaveManager.encode(start, 0.0))
+        names = sorted(set(action.name for action in journal.actions))
+        nameIndex = {name: i for i, name in enumerate(names)}
+        w.names(names)
+        w.array('q', [action.tick for action in journal.actions])
+        w.array('B', [nameIndex[action.name] for action in journal.actions])
+        w.blob(json.dumps([action.args for action in journal.actions], separators=(',', ':')).encode('utf-8'))
+        return bytes(w.data)
+
+    @staticmethod
+    def decodeJournal(database : GameDatabase, data : bytes) -> ActionJournal:
+        if data[:4] != SaveManager.journalMagic:
+            raise ValueError('Not a journal file')
+        r = SaveReader(data)
+        r.offset = 4
+        version, = r.unpack('H')
+        if version != SaveManager.journalVersion:
+            raise ValueError(f'Unsupported journal version {version}')
+        start, savedAt = SaveManager.decode(database, r.blob())
+        journal = ActionJournal(start.snapshot())
+        names = r.names()
+        for name in names:
+            if not name in ActionQueue.actionNames:
+                raise ValueError(f'Unknown action {name}')
+        ticks, nameIndices = r.array('q'), r.array('B')
+        for tick, nameIndex, args in zip(ticks, nameIndices, json.loads(r.blob().decode('utf-8'))):
+            journal.actions.append(GameAction(tick, names[nameIndex], tuple(args)))
+        return journal
+
+    @staticmethod
+    def saveJournal(database : GameDatabase, journal : ActionJournal, filePath : str):
+        data = SaveManager.encodeJournal(database, journal)
+        directory = os.path.dirname(filePath)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+        with open(filePath, 'wb') as file:
+            file.write(data)
+
+    @staticmethod
+    def loadJournal(database : GameDatabase, filePath : str) -> ActionJournal:
+        return SaveManager.decodeJournal(database, SaveManager.readSave(filePath))
+
+    @staticmethod
+    def verifySave(database : GameDatabase, journal : ActionJournal, filePath : str) -> bool:
+        # replays the journal up to the tick of the save and checks that it reproduces the save
+        target = SaveManager.load(database, filePath)
+        replayed = journal.replay(GameState(database), target.ticks)
+        # event timestamps are the wall-clock time the event triggered, which a replay cannot reproduce
+        for eName, eState in replayed.events.items():
+            if eName in target.events:
+                eState.timestampStr = target.events[eName].timestampStr
+        return SaveManager.encode(replayed, 0.0) == SaveManager.encode(target, 0.0)
+
+    @staticmethod
+    def catchUp(state : GameState, elapsedSeconds : float, progressCallback : Callable[[int, int], None] = None) -> CatchUpSummary:
+        # simulates the ticks that would have run in elapsedSeconds of play, without any UI.
+        # progressCallback is called with (ticks done, total ticks) after each chunk.
+        summary = CatchUpSummary()
+        summary.elapsedSeconds = max(0.0, elapsedSeconds)
+        summary.ticks = int(summary.elapsedSeconds * state.params.ticksPerPlayerSecond)
+
+        startCounts = {rName: rState.count for rName, rState in state.resources.items()}
+        untriggered = [eState for eState in state.events.values() if not eState.triggered]
+
+        ticksDone = 0
+        while ticksDone < summary.ticks:
+            chunk = min(SaveManager.catchUpChunkTicks, summary.ticks - ticksDone)
+            state.fastForward(chunk)
+            ticksDone += chunk
+            if progressCallback is not None:
+                progressCallback(ticksDone, summary.ticks)
+
+        for rName, rState in state.resources.items():
+            gained = rState.count - startCounts[rName]
+            if gained != 0.0:
+                summary.resourcesGained[rName] = gained
+        summary.eventsTriggered = [eState.info.name for eState in untriggered if eState.triggered]
+        return summary
+
+    @staticmethod
+    def loadWithCatchUp(database : GameDatabase, filePath : str, progressCallback : Callable[[int, int], None] = None):
+        # loads a save and simulates the wall-clock time that passed since it was written.
+        # returns the state and a CatchUpSummary.
+        state, savedAt = SaveManager.decode(database, SaveManager.readSave(filePath))
+        summary = SaveManager.catchUp(state, time.time() - savedAt, progressCallback)
+        return state, summary
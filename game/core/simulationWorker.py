@@ -0,0 +1,211 @@
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import NamedTuple
+
+from game.core.actionQueue import ActionQueue
+from game.core.timeline import Timeline
+
+class SimulationFrame(NamedTuple):
+    # what the UI draws: a clone of the state taken after a frame of ticks, and counters that go up
+    # whenever the state flagged events, projects or a reset as dirty. the UI compares the counters
+    # with those of the last frame it drew, so frames it never picked up still get their updates.
+    state: GameState
+    eventsVersion: int
+    projectsVersion: int
+    resetVersion: int
+    ticksPerSecond: float # achieved over the last second or so
+    targetTicksPerSecond: float # None at max speed
+    behind: bool # more than a frame of ticks was still owed after a recent frame
+    lagSeconds: float # real time the game clock is behind, from the ticks still owed
+    droppedSeconds: float # real time that was never simulated because catch-up was capped
+
+class SimulationWorker:
+    # owns the live GameState and advances it on its own thread, one frame every timerInterval.
+    # after every frame, and after applying player actions, a clone of the state is published as
+    # frame. publishing only replaces the frame attribute, so the UI takes the latest frame without
+    # locking and never sees a state while it is being advanced. frames must not be changed by the
+    # UI: every change goes back through submit and is applied between ticks.
+    #
+    # the game clock follows real time: every frame adds the real time since the last frame, times
+    # gameSpeed * ticksPerPlayerSecond, to the ticks owed, and runs the whole ticks owed. late or
+    # slow frames are caught up in bulk on the next ones, so no game time is lost to timer jitter.
+    # at most maxCatchUpSeconds of real time is owed at once and anything beyond it is dropped, so
+    # a machine that cannot keep up does not fall further and further behind.
+    #
+    # ticks only run for simulationBudget of each frame and the rest is left to the UI thread. at
+    # maxSpeed every frame runs as many ticks as fit in the budget and nothing is owed.
+    maxSpeed = -1
+
+    def __init__(self, state : GameState, gameSpeed : int = 1):
+        params = state.params
+        self.state = state
+        self.frameSeconds: float = params.timerInterval / 1000
+        self.budget: float = params.simulationBudget
+        self.ticksPerPlayerSecond: float = params.ticksPerPlayerSecond
+        self.maxCatchUpSeconds: float = params.maxCatchUpSeconds
+        self.gameSpeed: int = gameSpeed
+        self.timeline = Timeline(state) # checkpoints for rewinding the game
+        self.chunkTicks: int = 1 # ticks per advance call, sized to end close to the budget
+
+        self.lastFrameTime: float = time.perf_counter()
+        self.tickDebt: float = 0.0 # ticks owed to the game clock, including a fraction of a tick
+        self.lagSeconds: float = 0.0
+        self.droppedSeconds: float = 0.0
+
+        # achieved speed, measured over windows of at least rateWindowSeconds
+        self.rateWindowSeconds: float = 1.0
+        self.rateWindowStart: float = time.perf_counter()
+        self.rateWindowTicks: int = 0
+        self.rateWindowBehind: bool = False
+        self.ticksPerSecond: float = 0.0
+        self.behind: bool = False
+
+        self.requests: queue.SimpleQueue = queue.SimpleQueue() # (name, args) of submitted actions
+        self.retireRequested: bool = False
+        self.wake = threading.Event()
+        self.stopping: bool = False
+
+        self.eventsVersion: int = 0
+        self.projectsVersion: int = 0
+        self.resetVersion: int = 0
+        self.publish()
+
+        self.thread = threading.Thread(target=self.run, name='simulation', daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        # returns once the thread has finished its current frame, after which state can be used directly
+        self.stopping = True
+        self.wake.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def submit(self, name : str, *args):
+        # called from the UI thread. the action is applied before the next tick and shows up in the next frame.
+        if not name in ActionQueue.actionNames:
+            raise ValueError(f"Unknown action {name}")
+        self.requests.put((name, args))
+        self.wake.set()
+
+    def retire(self):
+        # called from the UI thread, see GameState.retire
+        self.retireRequested = True
+        self.wake.set()
+
+    def run(self):
+        nextFrameTime = time.perf_counter()
+        self.lastFrameTime = nextFrameTime
+        while not self.stopping:
+            self.wake.wait(max(0.0, nextFrameTime - time.perf_counter()))
+            self.wake.clear()
+            if self.stopping:
+                break
+
+            self.applyRequests()
+            now = time.perf_counter()
+            if now >= nextFrameTime:
+                # a frame that runs late delays the next one, its ticks are owed rather than lost
+                nextFrameTime = max(nextFrameTime + self.frameSeconds, now)
+                self.advanceFrame()
+            self.publish()
+
+    def applyRequests(self):
+        state = self.state
+        if self.retireRequested:
+            self.retireRequested = False
+            state.retire()
+        while True:
+            try:
+                name, args = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            state.actions.submit(name, *args)
+        state.actions.applyPending()
+
+    def advanceFrame(self):
+        startTime = time.perf_counter()
+        elapsed = startTime - self.lastFrameTime
+        self.lastFrameTime = startTime
+
+        gameSpeed = self.gameSpeed
+        if gameSpeed == 0 or gameSpeed == SimulationWorker.maxSpeed:
+            # nothing is owed while paused or at max speed
+            self.tickDebt = 0.0
+            self.lagSeconds = 0.0
+            if gameSpeed == 0:
+                # advance refreshes storage after a research purchase, so do it here while paused
+                self.state.updateStorageIfDirty()
+                self.measureRate(0, False)
+            else:
+                self.measureRate(self.runTicks(None, startTime), False)
+            return
+
+        targetTicksPerSecond = gameSpeed * self.ticksPerPlayerSecond
+        self.tickDebt += elapsed * targetTicksPerSecond
+        maxDebt = self.maxCatchUpSeconds * targetTicksPerSecond
+        if self.tickDebt > maxDebt:
+            self.droppedSeconds += (self.tickDebt - maxDebt) / targetTicksPerSecond
+            self.tickDebt = maxDebt
+
+        ticksDone = self.runTicks(int(self.tickDebt), startTime)
+        self.tickDebt -= ticksDone
+        self.lagSeconds = self.tickDebt / targetTicksPerSecond
+        self.measureRate(ticksDone, self.lagSeconds > self.frameSeconds)
+
+    def runTicks(self, tickCount : int, startTime : float) -> int:
+        # runs tickCount ticks, or as many as fit in the budget when tickCount is None, and stops
+        # early when the budget runs out. returns the ticks run. advance(n) matches n single steps,
+        # so the ticks run in chunks sized from the measured rate, checking the time between them.
+        state = self.state
+        deadline = startTime + self.frameSeconds * self.budget
+        ticksDone = 0
+        while tickCount is None or ticksDone < tickCount:
+            chunk = self.chunkTicks if tickCount is None else min(self.chunkTicks, tickCount - ticksDone)
+            state.advance(chunk)
+            ticksDone += chunk
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            # aim for about half of the remaining budget, so the last chunk does not overshoot much
+            self.chunkTicks = max(1, int((deadline - now) * ticksDone / max(now - startTime, 1e-9) / 2))
+        if ticksDone > 0:
+            self.timeline.record()
+        return ticksDone
+
+    def measureRate(self, ticksDone : int, behind : bool):
+        self.rateWindowTicks += ticksDone
+        self.rateWindowBehind = self.rateWindowBehind or behind
+        now = time.perf_counter()
+        if now - self.rateWindowStart < self.rateWindowSeconds:
+            return
+        self.ticksPerSecond = self.rateWindowTicks / (now - self.rateWindowStart)
+        self.behind = self.rateWindowBehind
+        self.rateWindowStart = now
+        self.rateWindowTicks = 0
+        self.rateWindowBehind = False
+
+    def publish(self):
+        # turns the dirty flags of the live state into frame counters, then publishes a clone
+        dirty = self.state.dirty
+        if dirty.reset:
+            # the UI decides what to rebuild after a reset, and the timeline starts over with the journal
+            dirty.reset = False
+            dirty.projects = False
+            self.resetVersion += 1
+            self.timeline = Timeline(self.state)
+        if dirty.events:
+            dirty.events = False
+            self.eventsVersion += 1
+        if dirty.projects:
+            dirty.projects = False
+            self.projectsVersion += 1
+        gameSpeed = self.gameSpeed
+        targetTicksPerSecond = None if gameSpeed == SimulationWorker.maxSpeed else gameSpeed * self.ticksPerPlayerSecond
+        self.frame = SimulationFrame(self.state.clone(), self.eventsVersion, self.projectsVersion, self.resetVersion,
+                                     self.ticksPerSecond, targetTicksPerSecond, self.behind, self.lagSeconds, self.droppedSeconds)
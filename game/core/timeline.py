@@ -0,0 +1,92 @@
+
+from __future__ import annotations
+
+from typing import List, NamedTuple
+
+from game.core.gameSnapshot import GameSnapshot
+
+class Checkpoint(NamedTuple):
+    tick: int
+    actionCount: int # journal actions applied before the snapshot was taken
+    snapshot: GameSnapshot
+
+class Timeline:
+    # checkpoints of a state every checkpointInterval ticks, together with the action journal. any
+    # earlier tick is reached by restoring the nearest earlier checkpoint and replaying the journal
+    # from there with bulk advance. when the checkpoints grow past memoryBudget bytes the older ones
+    # are thinned out, so their spacing grows with age: recent ticks stay cheap to seek to, and
+    # seeking far back costs a longer re-simulation.
+    def __init__(self, state : GameState, checkpointInterval : int = 1000, memoryBudget : int = 4 * 1024 * 1024):
+        self.state = state
+        self.checkpointInterval: int = checkpointInterval
+        self.memoryBudget: int = memoryBudget
+
+        journal = state.actions.journal
+        if journal is None:
+            journal = state.actions.startJournal()
+        self.journal = journal
+        self.checkpoints: List[Checkpoint] = [Checkpoint(journal.start.ticks, 0, journal.start)]
+        self.checkpointBytes: int = journal.start.byteSize()
+
+    def record(self):
+        # call after advancing the state. takes a checkpoint once checkpointInterval ticks passed.
+        if self.state.ticks - self.checkpoints[-1].tick < self.checkpointInterval:
+            return
+        self.checkpoints.append(Checkpoint(self.state.ticks, len(self.journal.actions), self.state.snapshot()))
+        while len(self.checkpoints) * self.checkpointBytes > self.memoryBudget and len(self.checkpoints) > 2:
+            self.thin()
+
+    def thin(self):
+        # removes the checkpoint whose neighbours are closest together relative to its age. the
+        # first checkpoint (the journal start) and the latest one are always kept.
+        now = self.state.ticks
+        bestIndex, bestScore = 1, None
+        for i in range(1, len(self.checkpoints) - 1):
+            gap = self.checkpoints[i + 1].tick - self.checkpoints[i - 1].tick
+            score = gap / (now - self.checkpoints[i].tick + self.checkpointInterval)
+            if bestScore is None or score < bestScore:
+                bestIndex, bestScore = i, score
+        del self.checkpoints[bestIndex]
+
+    def checkpointBefore(self, tick : int) -> Checkpoint:
+        # the latest checkpoint at or before tick
+        result = self.checkpoints[0]
+        for checkpoint in self.checkpoints:
+            if checkpoint.tick > tick:
+                break
+            result = checkpoint
+        return result
+
+    def seek(self, state : GameState, tick : int) -> GameState:
+        # re-simulates the timeline up to tick in state, which can be any state built from the same
+        # database, e.g. a clone. the timeline's own state is not touched.
+        if tick < self.checkpoints[0].tick or tick > self.state.ticks:
+            raise ValueError(f"Tick {tick} is outside the timeline")
+        checkpoint = self.checkpointBefore(tick)
+        state.restore(checkpoint.snapshot)
+        return self.journal.play(state, checkpoint.actionCount, tick)
+
+    def rewind(self, tick : int):
+        # time travel: moves the timeline's state back to tick and drops everything after it.
+        # projects marked persistentT keep the purchase count and progress they have now.
+        state = self.state
+        persistent = [(p.info.name, p.purchaseCount, p.progress) for p in state.projects.values() if p.info.persistentT]
+        self.seek(state, tick)
+
+        del self.journal.actions[self.actionCountAt(tick):]
+        self.checkpoints = [c for c in self.checkpoints if c.tick <= tick]
+
+        # carried over through the action queue, so replaying the journal still reproduces the timeline
+        for pName, purchaseCount, progress in persistent:
+            pState = state.projects[pName]
+            if pState.purchaseCount != purchaseCount or pState.progress != progress:
+                state.actions.submit('restoreProject', pName, purchaseCount, progress)
+        state.actions.applyPending()
+
+    def actionCountAt(self, tick : int) -> int:
+        # number of journal actions applied at or before tick
+        actions = self.journal.actions
+        count = len(actions)
+        while count > 0 and actions[count - 1].tick > tick:
+            count -= 1
+        return count
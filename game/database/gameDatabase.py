@@ -11,6 +11,20 @@ class ResourceList:
     def __init__(self, r : Dict[str, float]):
         self.r = r
 
+modifierTargets = ["buildingCost", "buildingProduction", "buildingUpkeep", "buildingStorage", "commandCost", "commandProduction"]
+
+class ModifierInfo(NamedTuple):
+    target: str # one of modifierTargets
+    name: str # building or command the modifier applies to, empty for all of them
+    resource: str # resource the modifier applies to, empty for all of them
+    multiplier: float # applied once per purchased research, per project purchase or per ideology rank
+
+class ModifierSource(NamedTuple):
+    kind: str # research, project or ideology
+    name: str
+    # multipliers by target, then by building or command name, then by resource name
+    multipliers: Dict[str, Dict[str, Dict[str, float]]]
+
 class CommandInfo(NamedTuple):
     name: str
     production: Dict[str, float]
@@ -37,6 +51,7 @@ class ResearchInfo(NamedTuple):
     unlocks: List[str]
     category: str
     description: str
+    modifiers: List[ModifierInfo]
     
 class ProjectInfo(NamedTuple):
     name: str
@@ -50,6 +65,7 @@ class ProjectInfo(NamedTuple):
     ideology: Ideology
     category: str
     description: str
+    modifiers: List[ModifierInfo]
 
 class ResourceInfo(NamedTuple):
     name: str
@@ -69,6 +85,7 @@ class EventInfo(NamedTuple):
 class IdeologyInfo(NamedTuple):
     name: str
     flavorText: str
+    modifiers: List[ModifierInfo]
     
 class DefenderInfo(NamedTuple):
     name: str
@@ -107,7 +124,6 @@ class GameParams:
         self.startingStorage["Land"] = 100
         
         self.startingResources["Credits"] = 500.0
-        self.startingResources["Land"] = self.startingStorage["Land"]
         
         self.startingBuildings["Solar Panels"] = 1
         self.startingBuildings["Storage Facility"] = 1
@@ -122,10 +138,12 @@ class GameParams:
             ]
         
         self.timerInterval = 250 # timer interval in milliseconds
+        self.framePollInterval = 20 # how often the UI checks for a new frame from the simulation, in milliseconds
+        self.simulationBudget = 0.8 # fraction of each timer interval the simulation may spend running ticks
+        self.maxCatchUpSeconds = 5.0 # real time the simulation may fall behind before the rest is dropped
         self.ticksPerPlayerSecond = 4.0
 
         self.gameSecondsPerTick = 60 * 60 # each tick is a game hour
-        self.ticksPerGameYear = 365.25 * 24 * 60 * 60 / self.gameSecondsPerTick
         self.ticksPerProcessorCycle = 4 # the processors operate more slowly than the game clock
         self.ticksPerArmyCycle = 4 # the armies operate more slowly than the game clock
         
@@ -143,6 +161,16 @@ class GameParams:
         self.buildingCategories = ["Mining", "Power", "Storage", "Processors", "Economy"]
         self.adversaryCategories = ["Cyber", "Lunar", "Extraterrestrial", "Temporal"]
 
+        self.updateDerived()
+
+    # parameters that updateDerived computes from others, in the attribute.entry form of the sweep overrides
+    derivedParameters = ['ticksPerGameYear', 'startingResources.Land']
+
+    def updateDerived(self):
+        # call after changing gameSecondsPerTick or startingStorage
+        self.ticksPerGameYear = 365.25 * 24 * 60 * 60 / self.gameSecondsPerTick
+        self.startingResources["Land"] = self.startingStorage["Land"]
+
 class GameDatabase:
     def __init__(self, filePathBase):
         with open(filePathBase + 'Buildings.json', 'r') as file:
@@ -230,7 +258,8 @@ class GameDatabase:
                 ideology = Ideology[r['ideology']],  # Convert string to Ideology enum
                 category = r['category'],
                 unlocks = r['unlocks'],
-                description = r['description']
+                description = r['description'],
+                modifiers = self.parseModifiers(r)
             )
             self.research[curResearch.name] = curResearch
 
@@ -247,7 +276,8 @@ class GameDatabase:
                 unlocks = p['unlocks'],
                 ideology = Ideology[p['ideology']],
                 category = p['category'],
-                description = p['description']
+                description = p['description'],
+                modifiers = self.parseModifiers(p)
             )
             self.projects[curProject.name] = curProject
             
@@ -255,7 +285,8 @@ class GameDatabase:
         for i in ideologyData['ideologies']:
             curIdeology = IdeologyInfo(
                 name = i['name'],
-                flavorText = i['flavorText']
+                flavorText = i['flavorText'],
+                modifiers = self.parseModifiers(i)
             )
             self.ideologies[curIdeology.name] = curIdeology
 
@@ -284,6 +315,44 @@ class GameDatabase:
             
         self.params: GameParams = GameParams(self)
         self.verifyData()
+        self.compileModifiers()
+        
+    def parseModifiers(self, data) -> List[ModifierInfo]:
+        return [ModifierInfo(
+                target = m['target'],
+                name = m.get('name', ''),
+                resource = m.get('resource', ''),
+                multiplier = float(m['multiplier'])
+            ) for m in data.get('modifiers', [])]
+        
+    def compileModifiers(self):
+        # expands every modifier into a multiplier per (building or command, resource) pair, so the
+        # game state can combine active sources without matching names at runtime
+        self.modifierSources: List[ModifierSource] = []
+        sources = [('research', r) for r in self.research.values()] + \
+                  [('project', p) for p in self.projects.values()] + \
+                  [('ideology', i) for i in self.ideologies.values()]
+        for kind, info in sources:
+            if len(info.modifiers) == 0:
+                continue
+            multipliers: Dict[str, Dict[str, Dict[str, float]]] = {}
+            for m in info.modifiers:
+                if not (m.target in modifierTargets):
+                    raise ValueError(f"Invalid modifier target {m.target} in {info.name}")
+                objects = self.commands if m.target.startswith('command') else self.buildings
+                if m.name != '' and not (m.name in objects):
+                    raise ValueError(f"Invalid modifier name {m.name} in {info.name}")
+                if m.resource != '' and not (m.resource in self.resources):
+                    raise ValueError(f"Invalid modifier resource {m.resource} in {info.name}")
+                
+                targetTable = multipliers.setdefault(m.target, {})
+                names = [m.name] if m.name != '' else list(objects.keys())
+                for name in names:
+                    resources = [m.resource] if m.resource != '' else list(self.resources.keys())
+                    table = targetTable.setdefault(name, {})
+                    for rName in resources:
+                        table[rName] = table.get(rName, 1.0) * m.multiplier
+            self.modifierSources.append(ModifierSource(kind, info.name, multipliers))
         
     def verifyData(self):
         for b in self.buildings.values():
@@ -303,57 +372,36 @@ class GameDatabase:
                 raise ValueError(f"Invalid command category {c.category}")
         
         
-    def saveToJSON(self, filePath: str):
+    def saveToJSON(self, filePathBase: str):
+        # writes the database in the same files and layout that the constructor reads
+        def modifiers(info):
+            return [{k: v for k, v in m._asdict().items() if v != ''} for m in info.modifiers]
+
         data = {
-            "commands": [
-                {
-                    "name": c.name,
-                    "production": c.production,
-                    "ideology": c.ideology,
-                    "costs": c.costs,
-                    "description": c.description
-                } for c in self.commands.values()
-            ],
-            "resources": [
-                {
-                    "name": r.name,
-                    "basePrice": r.basePrice,
-                    "baseDemand": r.baseDemand,
-                    "elasticity": r.elasticity
-                } for r in self.resources.values()
-            ],
-            "buildings": [
-                {
-                    "name": b.name,
-                    "baseCost": b.baseCost,
-                    "production": b.production,
-                    "upkeep": b.maintenance,
-                    "storage": b.storage,
-                    "costScaling": b.costScaling,
-                    "canDeactivate": b.canDeactivate,
-                    "description": b.description
-                } for b in self.buildings.values()
-            ],
-            "events": [
-                {
-                    "name": e.name,
-                    "resourcesRequired": e.resourcesRequired,
-                    "buildingsRequired": e.buildingsRequired,
-                    "ticksRequired": r.ticksRequired,
-                    "unlocks": r.unlocks,
-                    "income": r.income,
-                    "flavorText": r.flavorText,
-                    "mechanicsText": r.mechanicsText
-                } for e in self.events.values()
-            ]
+            "Commands": {"commands": [c._asdict() for c in self.commands.values()]},
+            "Resources": {"resources": [r._asdict() for r in self.resources.values()]},
+            "Buildings": {"buildings": [b._asdict() for b in self.buildings.values()]},
+            "Events": {"events": [e._asdict() for e in self.events.values()]},
+            "Research": {"research": [
+                dict(r._asdict(), ideology = r.ideology.name, modifiers = modifiers(r))
+                for r in self.research.values()]},
+            "Projects": {"projects": [
+                dict(p._asdict(), ideology = p.ideology.name, modifiers = modifiers(p))
+                for p in self.projects.values()]},
+            "Ideologies": {"ideologies": [
+                dict(i._asdict(), modifiers = modifiers(i))
+                for i in self.ideologies.values()]},
+            "Defenders": {"defenders": [d._asdict() for d in self.defenders.values()]},
+            "Adversaries": {"adversaries": [a._asdict() for a in self.adversaries.values()]}
         }
 
-        with open(filePath, 'w') as file:
-            json.dump(data, file, indent=2)
+        for suffix, fileData in data.items():
+            with open(filePathBase + suffix + '.json', 'w') as file:
+                json.dump(fileData, file, indent=2)
 
 if __name__ == "__main__":
     print('testing game database')
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    database = GameDatabase('gameDatabase.json')
-    database.saveToJSON('gameDatabaseEcho.json')
-    print('game database saved to gameDatabaseEcho.json')       
\ No newline at end of file
+    database = GameDatabase('gameData')
+    database.saveToJSON('gameDataEcho')
+    print('game database saved to gameDataEcho*.json')
@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+import time
+
+# Add the parent directory to sys.path. this is a simpler alternative to using setup.py
+# and requiring everyone add this as a package.
+currentDir = os.path.dirname(os.path.abspath(__file__))
+parentDir = os.path.dirname(currentDir)
+sys.path.append(parentDir)
+
+from game.database.gameDatabase import GameDatabase
+from game.core.gameState import GameState
+from game.core.saveManager import SaveManager
+from game.core.headlessRunner import HeadlessRunner, SimulationScript, SampleWriter
+
+# runs the game without the UI and streams samples of the state as csv or ndjson, e.g.
+#   python game/headless.py --ticks 1000000 --interval 1000 --script game/scripts/buildOrder.json > run.csv
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Run Helium Hustle without the UI.')
+    parser.add_argument('--ticks', type=int, required=True, help='number of ticks to simulate')
+    parser.add_argument('--interval', type=int, default=100, help='ticks between samples')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+    parser.add_argument('--script', help='json file with programs, a build order and timed actions')
+    parser.add_argument('--load', help='start from this save instead of a new game')
+    parser.add_argument('--output', help='file to write samples to, stdout by default')
+    parser.add_argument('--exact', action='store_true', help='step every tick instead of fast-forwarding steady stretches')
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parseArguments()
+    database = GameDatabase(os.path.join(currentDir, 'database', 'gameData'))
+
+    # the game prints as events trigger, which would mix with samples written to stdout
+    with open(os.devnull, 'w') as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            state = SaveManager.load(database, args.load) if args.load else GameState(database)
+            script = SimulationScript.load(args.script) if args.script else None
+            runner = HeadlessRunner(state, script, args.exact)
+            output = open(args.output, 'w', newline='') if args.output else stdout
+            writer = SampleWriter(output, args.format)
+            startTime = time.perf_counter()
+            runner.run(args.ticks, args.interval, writer.write)
+            elapsed = time.perf_counter() - startTime
+        finally:
+            sys.stdout = stdout
+
+    if args.output:
+        output.close()
+    print(f'simulated {args.ticks} ticks in {elapsed:.2f} seconds ({args.ticks / max(elapsed, 1e-9) * 60:,.0f} ticks per minute)', file=sys.stderr)
@@ -12,17 +12,38 @@ from PyQt6.QtWidgets import QApplication
 
 from game.database.gameDatabase import GameDatabase
 from game.core.gameState import GameState
+from game.core.saveManager import SaveManager
 from ui.gameUI import GameUI
 
+savePath = 'saves/autosave.sav'
+journalPath = 'saves/autosave.journal' # the actions of the last session, for reproducing bugs
+
+def reportCatchUpProgress(ticksDone : int, ticksTotal : int):
+    print(f'catching up: {ticksDone}/{ticksTotal} ticks', end='\r')
+
 if __name__ == '__main__':
     print('starting game')
     
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
     database = GameDatabase('database/gameData')
-    state = GameState(database)
+    if os.path.exists(savePath):
+        state, summary = SaveManager.loadWithCatchUp(database, savePath, reportCatchUpProgress)
+        print(f'\ncaught up {summary.ticks} ticks over {summary.elapsedSeconds:.0f} seconds offline')
+        for rName, gained in summary.resourcesGained.items():
+            print(f'  {rName}: {gained:+.2f}')
+        for eName in summary.eventsTriggered:
+            print(f'  event: {eName}')
+    else:
+        state = GameState(database)
+    
+    state.actions.startJournal()
     
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
     game = GameUI(state, database)
     game.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    exitCode = app.exec()
+    game.worker.stop()
+    SaveManager.save(state, savePath)
+    SaveManager.saveJournal(database, state.actions.journal, journalPath)
+    sys.exit(exitCode)
\ No newline at end of file
@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the parent directory to sys.path. this is a simpler alternative to using setup.py
+# and requiring everyone add this as a package.
+currentDir = os.path.dirname(os.path.abspath(__file__))
+parentDir = os.path.dirname(currentDir)
+sys.path.append(parentDir)
+
+from game.database.gameDatabase import GameDatabase
+from game.core.parameterSweep import SweepSettings, gridPoints, randomPoints, runSweep, writeTable
+
+# runs headless games over a grid or random sample of GameParams overrides, on all cores, and
+# prints one row of metrics per run, e.g.
+#   python game/sweep.py --ticks 200000 --script game/scripts/buildOrder.json --param armyFightRatio=0.005,0.01,0.02
+#   python game/sweep.py --ticks 200000 --script game/scripts/buildOrder.json --range ideologyScaleFactor=1.1,1.4 --samples 16
+
+def parseValues(text : str) -> tuple:
+    # name=v1,v2,... with json values, so integers stay integers
+    name, _, values = text.partition('=')
+    if not values:
+        raise argparse.ArgumentTypeError(f"Expected name=value,... but got {text}")
+    return name, [json.loads(v) for v in values.split(',')]
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Run Helium Hustle parameter sweeps without the UI.')
+    parser.add_argument('--ticks', type=int, required=True, help='number of ticks to simulate per run')
+    parser.add_argument('--interval', type=int, default=1000, help='ticks between samples of the peak resources')
+    parser.add_argument('--script', help='json file with programs, a build order and timed actions')
+    parser.add_argument('--param', type=parseValues, action='append', default=[],
+                        help='name=v1,v2,... values to sweep on a grid. starting tables use name.entry, e.g. startingResources.Credits')
+    parser.add_argument('--range', type=parseValues, action='append', default=[],
+                        help='name=low,high range to draw --samples random values from')
+    parser.add_argument('--samples', type=int, default=0, help='random points drawn per grid point')
+    parser.add_argument('--seed', type=int, help='seed for the random points')
+    parser.add_argument('--first', action='append', help='building to report the first purchase tick of, Data Center by default')
+    parser.add_argument('--peak', action='append', help='resource to report the peak count of, Credits by default')
+    parser.add_argument('--workers', type=int, help='worker processes, one per core by default')
+    parser.add_argument('--format', choices=['table', 'csv'], default='table')
+    parser.add_argument('--output', help='file to write the table to, stdout by default')
+    parser.add_argument('--exact', action='store_true', help='step every tick instead of fast-forwarding steady stretches')
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parseArguments()
+    database = GameDatabase(os.path.join(currentDir, 'database', 'gameData'))
+
+    points = gridPoints(dict(args.param))
+    if len(args.range) > 0:
+        ranges = {name: tuple(values) for name, values in args.range}
+        for name, values in ranges.items():
+            if len(values) != 2:
+                raise ValueError(f"Range {name} needs a low and a high value")
+        points = [{**point, **sample} for point in points for sample in randomPoints(ranges, max(1, args.samples), args.seed)]
+
+    scriptData = {}
+    if args.script:
+        with open(args.script, 'r') as file:
+            scriptData = json.load(file)
+    settings = SweepSettings(scriptData, args.ticks, args.interval, args.first or ['Data Center'], args.peak or ['Credits'], args.exact)
+
+    startTime = time.perf_counter()
+    results = runSweep(database, points, settings, args.workers)
+    elapsed = time.perf_counter() - startTime
+
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    writeTable(results, settings, output, args.format)
+    if args.output:
+        output.close()
+    print(f'{len(points)} runs of {args.ticks} ticks in {elapsed:.2f} seconds', file=sys.stderr)
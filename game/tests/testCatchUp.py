@@ -0,0 +1,128 @@
+import contextlib
+import io
+import os
+import time
+import unittest
+
+from game.database.gameDatabase import GameDatabase
+from game.core.gameState import GameState
+from game.core.saveManager import SaveManager
+
+gameDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def multiProgramState(database : GameDatabase) -> GameState:
+    # three programs on one processor each, with loops of 4, 5 and 6 processor cycles, so the
+    # programs only line up every 300 ticks
+    state = GameState(database)
+    for bName, count in [('Solar Panels', 6), ('Regolith Harvester', 3), ('Data Center', 3), ('Server Rack', 2), ('Storage Facility', 10)]:
+        bState = state.buildings[bName]
+        bState.unlocked = True
+        bState.totalCount = count
+        state.changeActiveCount(bState, count)
+    state.updateStorageAndProcessors()
+
+    programs = [
+        [('Sell Cloud Compute', 2), ('Idle', 2)],
+        [('Gather Regolith', 2), ('Idle', 3)],
+        [('Sell Cloud Compute', 1), ('Gather Regolith', 2), ('Idle', 3)]
+    ]
+    for programIndex, commands in enumerate(programs):
+        for commandIndex, (cName, maxCount) in enumerate(commands):
+            state.addCommandToProgram(programIndex, cName)
+            state.changeCommandMaxCount(programIndex, commandIndex, maxCount - 1)
+    for program in state.programs:
+        program.assignedProcessors = 0
+    state.updateProcessorAllocation()
+    for programIndex in range(0, len(programs)):
+        state.setAssignedProcessors(programIndex, 1)
+    state.advance(100)
+    return state
+
+def lateGameState(database : GameDatabase) -> GameState:
+    # all research, 500 of every building and every program loaded with every command. the loops
+    # only line up every 20,400 ticks, too long for catch-up to look for a cycle.
+    state = GameState(database)
+    for cName in state.commands.keys():
+        state.unlock(cName)
+    for rName in state.resources.keys():
+        state.unlock(rName)
+    for rName, rState in state.research.items():
+        rState.unlocked = True
+        rState.purchased = True
+        state.purchasedResearch.add(rName)
+    state.updateModifiers()
+    for bState in state.buildings.values():
+        bState.unlocked = True
+        bState.totalCount = 500
+        state.changeActiveCount(bState, 500)
+    state.updateStorageAndProcessors()
+
+    commandNames = list(state.commands.keys())
+    for programIndex in range(0, database.params.maxProgramCount):
+        for commandIndex, cName in enumerate(commandNames):
+            state.addCommandToProgram(programIndex, cName)
+            state.changeCommandMaxCount(programIndex, commandIndex, (programIndex + commandIndex) % 3)
+    for program in state.programs:
+        program.assignedProcessors = 0
+    state.updateProcessorAllocation()
+    for programIndex in range(0, database.params.maxProgramCount):
+        state.setAssignedProcessors(programIndex, int(state.resources['Processors'].storage) // database.params.maxProgramCount)
+    for rState in state.resources.values():
+        rState.count = rState.storage * 0.5
+    state.advance(100)
+    return state
+
+class TestCatchUp(unittest.TestCase):
+    def setUp(self):
+        self.database = GameDatabase(os.path.join(gameDir, 'database', 'gameData'))
+
+    def testMultiProgramCatchUp(self):
+        # eight hours offline with three programs must match stepping and take a fraction of its time
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = multiProgramState(self.database)
+            self.assertEqual([p.loopCycles() for p in start.programs[0:3]], [4, 5, 6])
+            self.assertEqual([p.assignedProcessors for p in start.programs[0:3]], [1, 1, 1])
+
+            caughtUp = start.clone()
+            startTime = time.perf_counter()
+            summary = SaveManager.catchUp(caughtUp, 8 * 3600)
+            catchUpSeconds = time.perf_counter() - startTime
+
+            stepped = start.clone()
+            startTime = time.perf_counter()
+            stepped.advance(summary.ticks)
+            stepSeconds = time.perf_counter() - startTime
+
+        self.assertEqual(summary.ticks, 115200)
+        self.assertEqual(caughtUp.ticks, stepped.ticks)
+        for rName, rState in stepped.resources.items():
+            self.assertAlmostEqual(caughtUp.resources[rName].count, rState.count, delta=1e-9 * max(1.0, abs(rState.count)), msg=rName)
+        for aName, aState in stepped.adversaries.items():
+            self.assertEqual(caughtUp.adversaries[aName].ticksToSurge, aState.ticksToSurge, msg=aName)
+        self.assertEqual([p.position() for p in caughtUp.programs], [p.position() for p in stepped.programs])
+        self.assertLess(catchUpSeconds, stepSeconds / 4, f'catch-up took {catchUpSeconds:.2f} s against {stepSeconds:.2f} s stepping')
+
+    def testLateGameCatchUp(self):
+        # with no cycle to find, catch-up must not cost more than stepping the same ticks
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = lateGameState(self.database)
+            self.assertEqual([p.assignedProcessors > 0 for p in start.programs], [True] * len(start.programs))
+
+            caughtUp = start.clone()
+            startTime = time.perf_counter()
+            summary = SaveManager.catchUp(caughtUp, 2 * 3600)
+            catchUpSeconds = time.perf_counter() - startTime
+
+            stepped = start.clone()
+            startTime = time.perf_counter()
+            stepped.advance(summary.ticks)
+            stepSeconds = time.perf_counter() - startTime
+
+        for rName, rState in stepped.resources.items():
+            self.assertAlmostEqual(caughtUp.resources[rName].count, rState.count, delta=1e-9 * max(1.0, abs(rState.count)), msg=rName)
+        self.assertEqual([p.position() for p in caughtUp.programs], [p.position() for p in stepped.programs])
+        # the margin only covers timing noise, looking for a cycle here used to take twice as long
+        self.assertLess(catchUpSeconds, stepSeconds * 1.25, f'catch-up took {catchUpSeconds:.2f} s against {stepSeconds:.2f} s stepping')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import contextlib
+import io
+import os
+import unittest
+
+from game.database.gameDatabase import GameDatabase
+from game.core.gameState import GameState
+from game.core.eventManager import EventManager
+
+gameDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class ScanEventManager(EventManager):
+    # the original per-tick scan over every event, kept as the reference for the schedule
+    def step(self):
+        for eState in self.state.events.values():
+            if eState.triggered:
+                continue
+            if self.eventShouldTrigger(eState):
+                self.triggerEvent(eState)
+                continue
+
+def triggerLog(state : GameState, tickCount : int) -> list:
+    # the tick each event triggered on, and the order of the active and ongoing lists after each tick
+    log = []
+    for i in range(0, tickCount):
+        state.advance(1)
+        log.append((
+            state.ticks,
+            [eName for eName, eState in state.events.items() if eState.triggered],
+            [eState.info.name for eState in state.activeEvents],
+            [eState.info.name for eState in state.ongoingEvents]))
+    return log
+
+class TestEventManager(unittest.TestCase):
+    def setUp(self):
+        self.database = GameDatabase(os.path.join(gameDir, 'database', 'gameData'))
+
+    def compareWithScan(self, prepare) -> list:
+        # runs the schedule and the scan side by side from the same start and returns the schedule's log
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduled = GameState(self.database)
+            prepare(scheduled)
+            scheduled.eventManager.rebuild()
+
+            scanned = GameState(self.database)
+            prepare(scanned)
+            scanned.eventManager = ScanEventManager(scanned)
+
+            lastTick = max(eState.info.ticksRequired for eState in scheduled.events.values())
+            tickCount = lastTick - scheduled.ticks + 10
+            scheduledLog = triggerLog(scheduled, tickCount)
+            scannedLog = triggerLog(scanned, tickCount)
+        self.assertEqual(scheduledLog, scannedLog)
+        return scheduledLog
+
+    def testMatchesScan(self):
+        log = self.compareWithScan(lambda state: None)
+        self.assertEqual(len(log[-1][1]), len(self.database.events))
+
+    def testTicksRequiredOnly(self):
+        # resource and building requirements do not hold an event back
+        def noResources(state : GameState):
+            for rState in state.resources.values():
+                rState.count = 0.0
+        log = self.compareWithScan(noResources)
+        self.assertEqual(len(log[-1][1]), len(self.database.events))
+
+    def testSameTickInDatabaseOrder(self):
+        # events due on the same tick trigger in database order, whatever their ticksRequired
+        def allDueAtOnce(state : GameState):
+            state.ticks = max(eState.info.ticksRequired for eState in state.events.values())
+        log = self.compareWithScan(allDueAtOnce)
+        self.assertEqual(log[0][1], list(self.database.events.keys()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import copy
+import os
+import unittest
+
+from game.database.gameDatabase import GameDatabase
+from game.core.parameterSweep import applyOverrides
+
+gameDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestParameterSweep(unittest.TestCase):
+    def setUp(self):
+        self.database = GameDatabase(os.path.join(gameDir, 'database', 'gameData'))
+
+    def testDerivedParametersFollow(self):
+        params = copy.deepcopy(self.database.params)
+        applyOverrides(params, {'gameSecondsPerTick': 2 * 60 * 60, 'startingStorage.Land': 250})
+        self.assertEqual(params.ticksPerGameYear, self.database.params.ticksPerGameYear / 2)
+        self.assertEqual(params.startingResources['Land'], 250)
+
+    def testDerivedParameterOverride(self):
+        # an explicit override of a derived parameter wins, whatever the order of the overrides
+        params = copy.deepcopy(self.database.params)
+        applyOverrides(params, {'startingResources.Land': 10, 'startingStorage.Land': 250})
+        self.assertEqual(params.startingStorage['Land'], 250)
+        self.assertEqual(params.startingResources['Land'], 10)
+
+    def testUnknownParameter(self):
+        params = copy.deepcopy(self.database.params)
+        with self.assertRaises(ValueError):
+            applyOverrides(params, {'startingStorage.Unobtainium': 1.0})
+        with self.assertRaises(ValueError):
+            applyOverrides(params, {'unknownParameter': 1.0})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import contextlib
+import io
+import os
+import unittest
+
+from game.database.gameDatabase import GameDatabase, ModifierInfo
+from game.core.gameState import GameState
+
+gameDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestRetire(unittest.TestCase):
+    def setUp(self):
+        # Universal Storage is the persistentR project. it doubles Storage Facility storage here, so
+        # its effect on storage shows whether retire kept it.
+        self.database = GameDatabase(os.path.join(gameDir, 'database', 'gameData'))
+        pInfo = self.database.projects['Universal Storage']
+        self.database.projects['Universal Storage'] = pInfo._replace(modifiers=[ModifierInfo('buildingStorage', 'Storage Facility', '', 2.0)])
+        self.database.compileModifiers()
+
+    def playAndRetire(self) -> GameState:
+        # buys the project and some buildings, plays a while, pays into the project again and retires
+        with contextlib.redirect_stdout(io.StringIO()):
+            state = GameState(self.database)
+            state.resources['Credits'].count = 1000.0
+            state.resources['Regolith'].count = 1000.0
+            for bName in ['Solar Panels', 'Regolith Harvester', 'Storage Facility']:
+                state.buildings[bName].unlocked = True
+                state.attemptPurchaseBuilding(bName)
+            state.completeProject('Universal Storage')
+            state.advance(1500)
+            state.projects['Universal Storage'].progress = 1234.0
+            state.retire()
+            state.updateStorageIfDirty()
+        return state
+
+    def testPersistentProjectKept(self):
+        state = self.playAndRetire()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fresh = GameState(self.database)
+        pState = state.projects['Universal Storage']
+        self.assertEqual(pState.purchaseCount, 1)
+        self.assertEqual(pState.progress, 1234.0)
+
+        self.assertEqual(state.ticks, fresh.ticks)
+        for bName, bState in fresh.buildings.items():
+            self.assertEqual(state.buildings[bName].totalCount, bState.totalCount, msg=bName)
+            self.assertEqual(state.buildings[bName].activeCount, bState.activeCount, msg=bName)
+        for rName, rState in fresh.resources.items():
+            self.assertEqual(state.resources[rName].count, rState.count, msg=rName)
+        self.assertEqual([eState.triggered for eState in state.events.values()], [False] * len(state.events))
+
+        # the kept purchase still doubles the storage of the starting Storage Facility
+        regolith = state.ledger.resourceIndex['Regolith']
+        self.assertEqual(state.ledger.storage[regolith], 2 * fresh.ledger.storage[regolith])
+
+    def testOtherProjectsReset(self):
+        pInfo = self.database.projects['Universal Storage']
+        self.database.projects['Universal Storage'] = pInfo._replace(persistentR=False)
+        state = self.playAndRetire()
+        pState = state.projects['Universal Storage']
+        self.assertEqual(pState.purchaseCount, 0)
+        self.assertEqual(pState.progress, 0.0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            fresh = GameState(self.database)
+        self.assertEqual(list(state.ledger.storage), list(fresh.ledger.storage))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import contextlib
+import io
+import os
+import struct
+import unittest
+
+from game.database.gameDatabase import GameDatabase
+from game.core.gameState import GameState
+from game.core.gameProgram import GameCommand
+from game.core.saveManager import SaveManager
+
+gameDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def stateValues(state : GameState) -> list:
+    # every saved value of the state, by entry name
+    values = [state.ticks, state.ticksUntilProcessorCycle, state.ticksUntilArmyCycle, sorted(state.purchasedResearch)]
+    for entries in [state.commands, state.resources, state.buildings, state.research, state.projects,
+                    state.events, state.ideologies, state.adversaries, state.defenders]:
+        for name, entry in entries.items():
+            values.append((name, [(k, getattr(entry, k)) for k in entry.__slots__ if not k in ('info', 'ledger', 'rState')]))
+    values.append([eState.info.name for eState in state.activeEvents])
+    values.append([eState.info.name for eState in state.ongoingEvents])
+    values.append([(p.instructionPointer, p.assignedProcessors, [(c.info.name, c.count, c.maxCount) for c in p.commands]) for p in state.programs])
+    return values
+
+class TestSaveManager(unittest.TestCase):
+    def setUp(self):
+        self.database = GameDatabase(os.path.join(gameDir, 'database', 'gameData'))
+
+    def playedState(self) -> GameState:
+        # a state past the first events, with buildings, research, a program and project payments
+        state = GameState(self.database)
+        program = state.programs[0]
+        for cName, maxCount in [('Sell Cloud Compute', 3), ('Gather Regolith', 2), ('Idle', 1)]:
+            command = GameCommand(state.commands[cName].info)
+            command.maxCount = maxCount
+            program.commands.append(command)
+        state.resources['Credits'].count = 1e9
+        state.resources['Regolith'].count = 1e6
+        for i in range(0, 2100):
+            if i % 50 == 0:
+                for bName in ['Solar Panels', 'Regolith Harvester', 'Data Center', 'Server Rack', 'Storage Facility']:
+                    state.attemptPurchaseBuilding(bName)
+            if i == 100:
+                for rName in list(state.research):
+                    state.attemptPurchaseResearch(rName)
+                pState = next(iter(state.projects.values()))
+                for rName in pState.resourcePayments:
+                    pState.resourcePayments[rName] = 0.5
+            state.step()
+        return state
+
+    def testRoundTrip(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            state = self.playedState()
+            triggered = [eState for eState in state.events.values() if eState.triggered]
+            self.assertGreater(len(triggered), 1)
+            state.markEventDisplayed(triggered[0].info.name)
+            triggered[1].timestampStr = '9:15 AM'
+
+            loaded, savedAt = SaveManager.decode(self.database, SaveManager.encode(state, 123.0))
+        self.assertEqual(savedAt, 123.0)
+        self.assertEqual(stateValues(loaded), stateValues(state))
+        for eName, eState in state.events.items():
+            self.assertEqual(loaded.events[eName].displayed, eState.displayed)
+            self.assertEqual(loaded.events[eName].timestampStr, eState.timestampStr)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            state.advance(2000)
+            loaded.advance(2000)
+        self.assertEqual(stateValues(loaded), stateValues(state))
+
+    def testUntriggeredEvents(self):
+        # events that never triggered load without a timestamp
+        with contextlib.redirect_stdout(io.StringIO()):
+            state = GameState(self.database)
+            loaded, savedAt = SaveManager.decode(self.database, SaveManager.encode(state, 0.0))
+        for eState in loaded.events.values():
+            self.assertFalse(eState.displayed)
+            self.assertIsNone(eState.timestampStr)
+
+    def testUnsupportedVersion(self):
+        # the version follows the four byte magic
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = bytearray(SaveManager.encode(GameState(self.database), 0.0))
+        self.assertEqual(struct.unpack_from('<H', data, 4)[0], SaveManager.saveVersion)
+        struct.pack_into('<H', data, 4, SaveManager.saveVersion + 1)
+        with self.assertRaises(ValueError):
+            SaveManager.decode(self.database, bytes(data))
+
+if __name__ == '__main__':
+    unittest.main()
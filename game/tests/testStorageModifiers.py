@@ -0,0 +1,54 @@
+import contextlib
+import io
+import os
+import unittest
+
+from game.database.gameDatabase import GameDatabase, ModifierInfo
+from game.core.gameState import GameState
+
+gameDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestStorageModifiers(unittest.TestCase):
+    def setUp(self):
+        # Universal Storage doubles the storage of Storage Facility with every purchase
+        self.database = GameDatabase(os.path.join(gameDir, 'database', 'gameData'))
+        pInfo = self.database.projects['Universal Storage']
+        self.database.projects['Universal Storage'] = pInfo._replace(modifiers=[ModifierInfo('buildingStorage', 'Storage Facility', '', 2.0)])
+        self.database.compileModifiers()
+
+    def projectState(self) -> GameState:
+        # the project completes about 50 ticks in, while harvesters keep filling regolith storage
+        state = GameState(self.database)
+        for bName, count in [('Solar Panels', 20), ('Regolith Harvester', 50), ('Storage Facility', 1)]:
+            bState = state.buildings[bName]
+            bState.unlocked = True
+            bState.totalCount = count
+            state.changeActiveCount(bState, count)
+        state.updateStorageAndProcessors()
+        pState = state.projects['Universal Storage']
+        pState.resourcePayments['Regolith'] = 10.0
+        pState.progress = 4950.0
+        return state
+
+    def testProjectStorageInBatch(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            stepped = self.projectState()
+            for i in range(0, 300):
+                stepped.step()
+            advanced = self.projectState()
+            advanced.advance(300)
+            fastForwarded = self.projectState()
+            fastForwarded.fastForward(300)
+
+        self.assertEqual(stepped.projects['Universal Storage'].purchaseCount, 1)
+        self.assertEqual(stepped.resources['Regolith'].storage, 2000.0)
+        for state in [advanced, fastForwarded]:
+            self.assertFalse(state.dirty.storage)
+            self.assertEqual(state.projects['Universal Storage'].purchaseCount, 1)
+            self.assertEqual(list(state.ledger.storage), list(stepped.ledger.storage))
+        self.assertEqual(list(advanced.ledger.count), list(stepped.ledger.count))
+        for rIndex, count in enumerate(stepped.ledger.count):
+            self.assertAlmostEqual(fastForwarded.ledger.count[rIndex], count, delta=1e-9 * max(1.0, abs(count)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,11 +11,13 @@ from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSize, QCoreApplication
 from game.database.gameDatabase import GameDatabase
 from game.core.gameState import GameState
 
+from game.ui.labelCache import LabelCache
 from game.util.styleSheets import StyleSheets
 
 class ProgramUIElements():
     def __init__(self, gameUI : GameUI):
         self.gameUI = gameUI
+        self.labelCache = LabelCache()
         
         self.programLabel = QLabel("Programs")
         self.programLabel.setStyleSheet(StyleSheets.BUILDING_TITLE)
@@ -64,14 +66,15 @@ class ProgramUIElements():
 
     def updateVisisbleProgramIndex(self):
         state : GameState = self.gameUI.state
+        labelCache = self.labelCache
         for i in range(0, len(state.programs)):
             if i == self.gameUI.visibleProgramIndex:
-                self.programIndexButtons[i].setStyleSheet(StyleSheets.SELECTED_BUTTON)
+                labelCache.setStyleSheet(self.programIndexButtons[i], StyleSheets.SELECTED_BUTTON)
             else:
-                self.programIndexButtons[i].setStyleSheet(StyleSheets.BUILDING_TITLE)
+                labelCache.setStyleSheet(self.programIndexButtons[i], StyleSheets.BUILDING_TITLE)
 
         activeProgram = state.programs[self.gameUI.visibleProgramIndex]
-        self.assignedProcessorsLabel.setText(f"{activeProgram.assignedProcessors} processors assigned ({state.freeProcessorCount} free)")
+        labelCache.setText(self.assignedProcessorsLabel, f"{activeProgram.assignedProcessors} processors assigned ({state.freeProcessorCount} free)")
 
 #rWidget = QLabel("text!")
 #color = QColor(*random.sample(range(255), 3))
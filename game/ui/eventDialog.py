@@ -119,7 +119,7 @@ class EventDialog(QDialog):
         self.buttonPressed(self.options[0])
         
     def buttonPressed(self, text):
-        self.gameUI.state.processEventOption(self.eState, text)
+        self.gameUI.submitAction('chooseEventOption', self.eState.info.name, text)
         
         #print('dialog', self.gameUI.dialog)
         self.gameUI.activeDialog = None
@@ -9,6 +9,7 @@ from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtGui import QFont, QIcon
 
 from game.util.styleSheets import StyleSheets
+from game.core.simulationWorker import SimulationWorker
 
 class GameSpeedWidget(QWidget):
     def __init__(self, gameUI):
@@ -23,15 +24,16 @@ class GameSpeedWidget(QWidget):
         layout.setContentsMargins(2, 2, 2, 2)
         layout.setSpacing(2)
 
-        self.speeds = [0, 1, 3, 10, 50, 200]
-        self.iconNames = ['pause', '1x', '3x', '10x', '50x', '200x']
+        # max runs as many ticks as fit in the simulation's share of each frame
+        self.speeds = [0, 1, 3, 10, 50, 200, SimulationWorker.maxSpeed]
+        self.iconNames = ['pause', '1x', '3x', '10x', '50x', '200x', 'max']
         self.buttons : Dict[int, QPushButton] = {}
 
         layout.addStretch()
         
         for speed, icon in zip(self.speeds, self.iconNames):
             button = self.gameUI.makeIconButton(f'icons/gameSpeed/{icon}.png', 56, 56)
-            button.setToolTip(f'{speed}x speed')
+            button.setToolTip('max speed' if speed == SimulationWorker.maxSpeed else f'{speed}x speed')
             button.clicked.connect(partial(self.setGameSpeed, speed))
             self.buttons[speed] = button
             layout.addWidget(button)
@@ -47,7 +49,7 @@ class GameSpeedWidget(QWidget):
             button.setIcon(QIcon(f'icons/gameSpeed{selectedStr}/{icon}.png'))
             
     def setGameSpeed(self, speed):
-        print(f"Setting game speed to {speed}x")
+        print(f"Setting game speed to {'max' if speed == SimulationWorker.maxSpeed else f'{speed}x'}")
         self.gameUI.gameSpeed = speed
         self.reloadIcons()
         
@@ -14,6 +14,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSize, QCoreApplication
 from game.database.gameDatabase import GameDatabase
 from game.core.gameState import GameState
 from game.core.gameProgram import GameProgram, GameCommand
+from game.core.simulationWorker import SimulationWorker
 
 from game.util.enums import GameWindowMode
 from game.util.styleSheets import StyleSheets
@@ -23,6 +24,7 @@ from game.ui.programWidget import ProgramWidget
 from game.ui.eventDialog import EventDialog
 from game.ui.eventListWidget import EventListWidget
 from game.ui.gameSpeedWidget import GameSpeedWidget
+from game.ui.labelCache import LabelCache
 
 from game.views.commandView import CommandView
 from game.views.buildingView import BuildingView
@@ -43,14 +45,19 @@ class GameUI(QMainWindow):
         self.setWindowTitle("Helium Hustle")
         self.setGeometry(100, 100, 1900, 1100)
 
-        self.state = state
+        # the state is advanced by the worker on its own thread. self.state is the latest frame the
+        # UI picked up, a clone that is only read; changes go back to the worker as actions.
+        self.worker = SimulationWorker(state)
+        self.frame = self.worker.frame
+        self.state = self.frame.state
         self.database = database
         self.params = self.database.params
         self.mode : GameWindowMode = GameWindowMode.BUILDINGS
         self.visibleProgramIndex = 0
-        self.gameSpeed = 1
+        self.eventsShown = set() # events marked displayed that have not reached a frame yet
 
         self.pixmapCache = PixmapCache()
+        self.labelCache = LabelCache() # for the labels of the left frame, the views have their own
         
         self.initUI()
 
@@ -96,9 +103,10 @@ class GameUI(QMainWindow):
         self.mainLayout.addWidget(self.middleFrame, 3)
         self.mainLayout.addWidget(self.rightFrame, 1)
         
+        self.worker.start()
         self.tickTimer = QTimer(self)
         self.tickTimer.timeout.connect(self.timerTick)
-        self.tickTimer.start(self.params.timerInterval)
+        self.tickTimer.start(self.params.framePollInterval)
         
         self.resizeTimer = QTimer(self)
         self.resizeTimer.setSingleShot(True)
@@ -129,6 +137,9 @@ class GameUI(QMainWindow):
         self.gameSpeedLabel = QLabel("Game Speed")
         self.gameSpeedLabel.setStyleSheet(StyleSheets.BUILDING_TITLE)
         
+        self.tickRateLabel = QLabel("")
+        self.tickRateLabel.setStyleSheet(StyleSheets.GENERAL_12PT)
+        
         self.gameTimeWidget = QLabel("Uptime: ")
         self.gameTimeWidget.setStyleSheet(StyleSheets.GENERAL_12PT_BOLD)
         
@@ -136,6 +147,7 @@ class GameUI(QMainWindow):
         self.leftLayout.addWidget(self.mainMenu)
         self.leftLayout.addWidget(self.gameSpeedLabel)
         self.leftLayout.addWidget(self.gameSpeedWidget)
+        self.leftLayout.addWidget(self.tickRateLabel)
         self.leftLayout.addWidget(self.gameTimeWidget)
         self.leftLayout.addWidget(self.resourceDisplay)
         
@@ -219,17 +231,35 @@ class GameUI(QMainWindow):
         self.middleLayout.addWidget(middleWidget)
         #self.middleLayout.addStretch(1)
 
+    @property
+    def gameSpeed(self) -> int:
+        return self.worker.gameSpeed
+
+    @gameSpeed.setter
+    def gameSpeed(self, value : int):
+        self.worker.gameSpeed = value
+
     def timerTick(self):
+        # polls for a new frame from the worker, the UI is only updated when there is one
+        frame = self.worker.frame
+        if frame is self.frame:
+            return
         
         if self.activeDialog:
             if self.state.debugSkipEvents:
                 self.activeDialog.accept()
             # do not tick game while dialog is active.
             #return
-            
-        if self.gameSpeed > 0:
-            for i in range(0, self.gameSpeed):
-                self.state.step()
+
+        previousFrame = self.frame
+        self.frame = frame
+        self.state = frame.state
+        self.state.dirty.events = frame.eventsVersion != previousFrame.eventsVersion
+        self.state.dirty.projects = frame.projectsVersion != previousFrame.projectsVersion
+        if frame.resetVersion != previousFrame.resetVersion:
+            # most widgets are made for every building, command and resource, so they only need new
+            # values. the research and project views are made from purchases and are rebuilt if shown.
+            self.state.dirty.projects = self.state.dirty.projects or self.mode in (GameWindowMode.RESEARCH, GameWindowMode.PROJECTS)
 
         majorUpdateNeeded = False
         if self.state.dirty.projects:
@@ -241,17 +271,33 @@ class GameUI(QMainWindow):
             self.updateLabels()
         
         for eState in chain(self.state.activeEvents, self.state.ongoingEvents):
-            if not eState.displayed:
+            if eState.displayed:
+                self.eventsShown.discard(eState.info.name)
+            elif not eState.info.name in self.eventsShown:
                 self.displayEvent(eState)
                 break
         
+    def updateTickRate(self):
+        # achieved speed, in red when the simulation cannot keep up with the selected speed
+        frame = self.frame
+        text = f'{frame.ticksPerSecond:,.0f} ticks/s'
+        if frame.targetTicksPerSecond is None:
+            text += ' (max speed)'
+        elif frame.behind:
+            text += f' (behind {frame.targetTicksPerSecond:,.0f} ticks/s, {frame.lagSeconds:.1f} s lag)'
+        labelCache = self.labelCache
+        labelCache.setText(self.tickRateLabel, text)
+        labelCache.setToolTip(self.tickRateLabel, f'Game time lost to the catch-up limit: {frame.droppedSeconds:.1f} s')
+        labelCache.setStyleSheet(self.tickRateLabel, StyleSheets.BUILDING_RESOURCE_LIST_RED if frame.behind else StyleSheets.GENERAL_12PT)
+
     def updateGameTime(self):
         gameSeconds = self.state.ticks * self.database.params.gameSecondsPerTick
-        self.gameTimeWidget.setText('System uptime: ' + formatSystemUptime(gameSeconds))
+        self.labelCache.setText(self.gameTimeWidget, 'System uptime: ' + formatSystemUptime(gameSeconds))
     
     def updateLabels(self):
         self.resourceDisplay.updateLabels()
         self.updateGameTime()
+        self.updateTickRate()
         
         if self.mode == GameWindowMode.COMMANDS:
             self.commandView.updateLabels()
@@ -289,16 +335,21 @@ class GameUI(QMainWindow):
         self.rightLayout.insertWidget(self.rightLayout.count() - 1, self.eventList)
         self.state.dirty.events = False
 
+    def submitAction(self, name : str, *args):
+        # every change to the state goes through the worker's action queue so it is journaled. the
+        # worker applies it between ticks and publishes a new frame right away.
+        self.worker.submit(name, *args)
+
     def runCommand(self, name : str):
-        self.state.runCommand(name)
+        self.submitAction('runCommand', name)
         self.updateLabels()
         
     def purchaseBuilding(self, name : str):
-        self.state.attemptPurchaseBuilding(name)
+        self.submitAction('attemptPurchaseBuilding', name)
         self.updateLabels()
         
     def purchaseResearch(self, name : str):
-        self.state.attemptPurchaseResearch(name)
+        self.submitAction('attemptPurchaseResearch', name)
         self.updateLabels()
         
     def makeIconLabel(self, iconPath, iconWidth, iconHeight):
@@ -321,47 +372,35 @@ class GameUI(QMainWindow):
 
     def changeAssignedProcessors(self, delta):
         activeProgram = self.getActiveProgram()
-        if delta < 0:
-            activeProgram.assignedProcessors = max(0, activeProgram.assignedProcessors + delta)
-        else:
-            maxAvailableProcessors = min(delta, self.state.freeProcessorCount)
-            activeProgram.assignedProcessors += maxAvailableProcessors
+        self.submitAction('setAssignedProcessors', self.visibleProgramIndex, activeProgram.assignedProcessors + delta)
         self.updateLabels()
 
     def restartAllPrograms(self):
-        for program in self.state.programs:
-            program.resetAllCommands()
+        self.submitAction('restartAllPrograms')
         self.updateLabels()
 
     def getActiveProgram(self) -> GameProgram:
         return self.state.programs[self.visibleProgramIndex]
     
     def addCommandToProgram(self, commandName):
-        activeProgram = self.getActiveProgram()
-        activeProgram.commands.append(GameCommand(self.state.commands[commandName].info))
+        self.submitAction('addCommandToProgram', self.visibleProgramIndex, commandName)
         self.updateLabels()
 
     def modifyProjectPayment(self, pName, rName, value):
-        pState : ProjectState = self.state.projects[pName]
-        pState.resourcePayments[rName] = max(0, pState.resourcePayments[rName] + value)
+        self.submitAction('modifyProjectPayment', pName, rName, value)
         
     def modifyBuildingActive(self, bName : str, deltaValue : int):
-        bState : BuildingState = self.state.buildings[bName]
-        bState.activeCount = bState.activeCount + deltaValue
-        bState.activeCount = max(bState.activeCount, 0)
-        bState.activeCount = min(bState.activeCount, bState.totalCount)
+        self.submitAction('modifyBuildingActive', bName, deltaValue)
         self.updateLabels()
         
     def removeBuilding(self, bName : str):
-        bState : BuildingState = self.state.buildings[bName]
-        bState.totalCount -= 1
-        bState.totalCount = max(bState.totalCount, 0)
-        bState.activeCount = min(bState.activeCount, bState.totalCount)
+        self.submitAction('removeBuilding', bName)
         self.updateLabels()
         
     def displayEvent(self, eState : EventState):
         #print('display event: ' + eState.info.name)
-        eState.displayed = True
+        self.eventsShown.add(eState.info.name)
+        self.submitAction('markEventDisplayed', eState.info.name)
         self.activeDialog = EventDialog(self, self, eState)
         self.activeDialog.show()
         
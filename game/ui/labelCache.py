@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from typing import Dict
+
+from PyQt6.QtWidgets import QWidget
+
+class LabelCache:
+    # the last text, style sheet and tooltip written to each widget, and the last value of anything
+    # else a view draws. views set everything on every frame, but setText and setStyleSheet relayout
+    # and repaint the widget even when nothing changed, so only the changes reach Qt. at high game
+    # speeds most labels do not change between frames.
+    #
+    # every card owns its cache, so the entries go away with the card when a view is rebuilt.
+    def __init__(self):
+        self.texts: Dict[QWidget, str] = {}
+        self.styleSheets: Dict[QWidget, str] = {}
+        self.toolTips: Dict[QWidget, str] = {}
+        self.values: Dict[object, object] = {}
+
+    def setText(self, widget : QWidget, text : str) -> bool:
+        if self.texts.get(widget) == text:
+            return False
+        self.texts[widget] = text
+        widget.setText(text)
+        return True
+
+    def setStyleSheet(self, widget : QWidget, styleSheet : str) -> bool:
+        if self.styleSheets.get(widget) == styleSheet:
+            return False
+        self.styleSheets[widget] = styleSheet
+        widget.setStyleSheet(styleSheet)
+        return True
+
+    def setToolTip(self, widget : QWidget, toolTip : str) -> bool:
+        if self.toolTips.get(widget) == toolTip:
+            return False
+        self.toolTips[widget] = toolTip
+        widget.setToolTip(toolTip)
+        return True
+
+    def changed(self, key : object, value : object) -> bool:
+        # true the first time and whenever value differs from the last one stored for key, e.g. the
+        # affordability that decides the colour a card paints itself in
+        if key in self.values and self.values[key] == value:
+            return False
+        self.values[key] = value
+        return True
@@ -9,13 +9,18 @@ from PyQt6.QtWidgets import (QWidget, QListWidget, QHBoxLayout, QVBoxLayout,
 from PyQt6.QtCore import Qt, QSize
 
 from game.core.gameProgram import GameProgram, GameCommand
+from game.ui.labelCache import LabelCache
 from game.util.styleSheets import StyleSheets
 
 class ProgramItemWidget(QWidget):
-    def __init__(self, command : GameCommand):
+    def __init__(self, command : GameCommand, commandIndex : int):
         super().__init__()
         
+        # the command in the latest frame, and its index in the program when the list was loaded.
+        # frames are clones, so rows are matched to commands by index rather than by identity.
         self.command = command
+        self.commandIndex = commandIndex
+        self.labelCache = LabelCache()
         
         layout = QHBoxLayout(self)
         layout.setContentsMargins(5, 5, 5, 5)  # Reduce margins for a more compact look
@@ -55,7 +60,7 @@ class ProgramItemWidget(QWidget):
         layout.addWidget(self.removeButton)
         
     def updateNameLabel(self):
-        self.nameLabel.setText(f"{self.command.info.name} (x{self.command.maxCount})")
+        self.labelCache.setText(self.nameLabel, f"{self.command.info.name} (x{self.command.maxCount})")
 
 class ProgramWidget(QWidget):
     def __init__(self, gameUI : GameUI):
@@ -85,33 +90,40 @@ class ProgramWidget(QWidget):
         state : GameState = self.gameUI.state
         activeProgram : GameProgram = state.programs[self.gameUI.visibleProgramIndex]
 
-        for command in activeProgram.commands:
-            self.addCommand(command)
+        for commandIndex, command in enumerate(activeProgram.commands):
+            self.addCommand(command, commandIndex)
         
     def loadVisibleProgramFromList(self):
-        state : GameState = self.gameUI.state
-        activeProgram : GameProgram = state.programs[self.gameUI.visibleProgramIndex]
-        activeProgram.commands = []
+        order = []
         for i in range(self.listWidget.count()):
             item = self.listWidget.item(i)
             widget = self.listWidget.itemWidget(item)
-            activeProgram.commands.append(widget.command)
-        activeProgram.resetAllCommands()
+            order.append(widget.commandIndex)
+        self.gameUI.submitAction('reorderProgram', self.gameUI.visibleProgramIndex, order)
         
     def updateProgram(self):
         state : GameState = self.gameUI.state
         activeProgram : GameProgram = state.programs[self.gameUI.visibleProgramIndex]
         
+        # the list is only rebuilt when commands were added, removed or moved. rebuilding every frame
+        # would cancel drags and clicks in progress.
         inconsistencyFound = (self.listWidget.count() != len(activeProgram.commands))
         if not inconsistencyFound:
             for i in range(self.listWidget.count()):
                 item = self.listWidget.item(i)
                 widget = self.listWidget.itemWidget(item)
-                if widget.command != activeProgram.commands[i]:
+                if widget.commandIndex != i or widget.command.info.name != activeProgram.commands[i].info.name:
                     inconsistencyFound = True
+                    break
         
         if inconsistencyFound:
             self.loadListFromVisibleProgram()
+            return
+
+        for i in range(self.listWidget.count()):
+            widget = self.listWidget.itemWidget(self.listWidget.item(i))
+            widget.command = activeProgram.commands[i]
+            widget.updateNameLabel()
             
     def updateProgressBars(self):
         state : GameState = self.gameUI.state
@@ -129,9 +141,9 @@ class ProgramWidget(QWidget):
             if delta > 0.00001:
                 widget.progressBar.setValue(targetValue)
             
-    def addCommand(self, command : GameCommand):
+    def addCommand(self, command : GameCommand, commandIndex : int):
         item = QListWidgetItem(self.listWidget)
-        itemWidget = ProgramItemWidget(command)
+        itemWidget = ProgramItemWidget(command, commandIndex)
         item.setSizeHint(itemWidget.sizeHint())
         self.listWidget.addItem(item)
         self.listWidget.setItemWidget(item, itemWidget)
@@ -142,16 +154,8 @@ class ProgramWidget(QWidget):
         itemWidget.removeButton.clicked.connect(lambda: self.removeItem(item))
 
     def freqClick(self, item, direction):
-        state : GameState = self.gameUI.state
-        activeProgram : GameProgram = state.programs[self.gameUI.visibleProgramIndex]
-        activeCommand = activeProgram.commands[self.listWidget.row(item)]
-        activeCommand.maxCount += direction
-        activeCommand.maxCount = min(activeCommand.maxCount, 1000)
-        activeCommand.maxCount = max(activeCommand.maxCount, 1)
-        activeCommand.count = 0
-        
-        widget = self.listWidget.itemWidget(item)
-        widget.updateNameLabel()
+        # the label follows once the change reaches a frame, see updateProgram
+        self.gameUI.submitAction('changeCommandMaxCount', self.gameUI.visibleProgramIndex, self.listWidget.row(item), direction)
         
     def removeItem(self, item):
         self.listWidget.takeItem(self.listWidget.row(item))
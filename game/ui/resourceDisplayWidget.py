@@ -9,12 +9,14 @@ from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSize, QCoreApplication
 
 from game.database.gameDatabase import GameDatabase
 from game.core.gameState import GameState
+from game.ui.labelCache import LabelCache
 from game.util.styleSheets import StyleSheets
 
 class ResourceDisplayWidget(QWidget):
     def __init__(self, gameUI : GameUI):
         super().__init__()
         self.gameUI = gameUI
+        self.labelCache = LabelCache()
         self.initUI()
 
     def getResourceString(self, rState : ResourceState):
@@ -73,19 +75,24 @@ class ResourceDisplayWidget(QWidget):
             
     def updateLabels(self):
         state = self.gameUI.state
+        labelCache = self.labelCache
+        count = state.ledger.count
+        income = state.ledger.income
+        storage = state.ledger.storage
         for rState in state.resources.values():
+            rIndex = rState.index
             rLabelValue = self.rValueLabels[rState.info.name]
             if rState.info.name == "Processors":
-                rLabelValue.setText(f"{rState.storage} ({state.freeProcessorCount} unassigned)")
+                labelCache.setText(rLabelValue, f"{round(storage[rIndex])} ({state.freeProcessorCount} unassigned)")
             else:
                 rLabelIncome = self.rIncomeLabels[rState.info.name]
 
-                c = rState.count
+                c = count[rIndex]
                 if c >= 100000:
                     cStr = f"{c:.3e}"
                 else:
                     cStr = f"{c:.1f}".rstrip('0').rstrip('.')
 
-                rLabelValue.setText(f"{cStr} / {round(rState.storage)}")
-                rate = state.convertPerTickToPerSecond(rState.income)
-                rLabelIncome.setText(f"{rate}/s")
+                labelCache.setText(rLabelValue, f"{cStr} / {round(storage[rIndex])}")
+                rate = state.convertPerTickToPerSecond(income[rIndex])
+                labelCache.setText(rLabelIncome, f"{rate}/s")
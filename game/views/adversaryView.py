@@ -11,6 +11,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSize, QCoreApplication
 from game.database.gameDatabase import GameDatabase
 from game.core.gameState import GameState
 from game.ui.collapsibleMenuWidget import CollapsibleMenuWidget, CollapsibleSectionEntries
+from game.ui.labelCache import LabelCache
 from game.util.enums import GameWindowMode
 from game.util.styleSheets import StyleSheets
 
@@ -19,6 +20,7 @@ class DefenderButtonWidget(QPushButton):
         super().__init__()
         self.name = name
         self.gameUI = gameUI
+        self.labelCache = LabelCache()
         self.state = gameUI.state
         self.setFixedWidth(270)
         self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.MinimumExpanding)
@@ -108,16 +110,17 @@ class DefenderButtonWidget(QPushButton):
         state = self.gameUI.state
         dState = state.defenders[self.name]
 
-        self.strengthLabel.setText(f"Your forces:\n{dState.rState.count} / {dState.rState.storage}")
-        self.decayLabel.setText(f"Attrition rate: <b>{dState.decayRate * 100}% /s<\b>")
-        
-        self.update()
+        labelCache = self.labelCache
+        rIndex = dState.rState.index
+        labelCache.setText(self.strengthLabel, f"Your forces:\n{state.ledger.count[rIndex]} / {state.ledger.storage[rIndex]}")
+        labelCache.setText(self.decayLabel, f"Attrition rate: <b>{dState.decayRate * 100}% /s<\b>")
         
 class AdversaryButtonWidget(QPushButton):
     def __init__(self, gameUI : GameUI, name : str):
         super().__init__()
         self.name = name
         self.gameUI = gameUI
+        self.labelCache = LabelCache()
         self.state = gameUI.state
         self.setFixedWidth(270)
         self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.MinimumExpanding)
@@ -216,13 +219,12 @@ class AdversaryButtonWidget(QPushButton):
         state = self.gameUI.state
         aState = state.adversaries[self.name]
 
-        self.strengthLabel.setText(f"Enemy forces: {aState.strength}")
-        self.effectivenessLabel.setText(f"Effectiveness: {aState.effectiveness}%")
-        self.spawnRateLabel.setText(f"Spawn rate: <b>{aState.spawnRate}/s</b>")
-        self.nSurgeTimeLabel.setText(f"Time to next surge: <b>{state.convertTicksToYears(aState.ticksToSurge)} years<\b>")
-        self.nSurgeStrLabel.setText(f"Next surge size: <b>{aState.nextSurgeStrength}<\b>")
-        
-        self.update()
+        labelCache = self.labelCache
+        labelCache.setText(self.strengthLabel, f"Enemy forces: {aState.strength}")
+        labelCache.setText(self.effectivenessLabel, f"Effectiveness: {aState.effectiveness}%")
+        labelCache.setText(self.spawnRateLabel, f"Spawn rate: <b>{aState.spawnRate}/s</b>")
+        labelCache.setText(self.nSurgeTimeLabel, f"Time to next surge: <b>{state.convertTicksToYears(aState.ticksToSurge)} years<\b>")
+        labelCache.setText(self.nSurgeStrLabel, f"Next surge size: <b>{aState.nextSurgeStrength}<\b>")
     
 class AdversaryView():
     def __init__(self, gameUI : GameUI):
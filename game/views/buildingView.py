@@ -11,6 +11,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSize, QCoreApplication
 from game.database.gameDatabase import BuildingInfo, GameDatabase
 from game.core.gameState import BuildingState, GameState
 from game.ui.collapsibleMenuWidget import CollapsibleMenuWidget, CollapsibleSectionEntries
+from game.ui.labelCache import LabelCache
 from game.util.styleSheets import StyleSheets
 
 class BuildingButtonWidget(QPushButton):
@@ -20,6 +21,7 @@ class BuildingButtonWidget(QPushButton):
         super().__init__()
         self.bName = bName
         self.gameUI = gameUI
+        self.labelCache = LabelCache()
         
         self.setFixedWidth(270)
         self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.MinimumExpanding)
@@ -253,22 +255,28 @@ class BuildingButtonWidget(QPushButton):
         bState : BuildingState = state.buildings[self.bName]
         bCost : ResourceList = state.getBuildingCost(self.bName)
         
+        labelCache = self.labelCache
+        count = state.ledger.count
+        resourceIndex = state.ledger.resourceIndex
+        
         for rName, rCost in bCost.r.items():
-            rValue = state.resources[rName].count
+            rValue = count[resourceIndex[rName]]
             if rValue < rCost:
-                self.rNameLabels[rName].setStyleSheet(StyleSheets.BUILDING_RESOURCE_LIST_RED)
-                self.rValueLabels[rName].setStyleSheet(StyleSheets.BUILDING_RESOURCE_LIST_RED)
+                styleSheet = StyleSheets.BUILDING_RESOURCE_LIST_RED
             else:
-                self.rNameLabels[rName].setStyleSheet(StyleSheets.BUILDING_RESOURCE_LIST)
-                self.rValueLabels[rName].setStyleSheet(StyleSheets.BUILDING_RESOURCE_LIST)
-            self.rValueLabels[rName].setText(f"{rCost}")
+                styleSheet = StyleSheets.BUILDING_RESOURCE_LIST
+            labelCache.setStyleSheet(self.rNameLabels[rName], styleSheet)
+            labelCache.setStyleSheet(self.rValueLabels[rName], styleSheet)
+            labelCache.setText(self.rValueLabels[rName], f"{rCost}")
                 
         if bState.info.canDeactivate:
-            self.countLabel.setText(f"({bState.activeCount}/{bState.totalCount})")
+            labelCache.setText(self.countLabel, f"({bState.activeCount}/{bState.totalCount})")
         else:
-            self.countLabel.setText(f"({bState.totalCount})")
+            labelCache.setText(self.countLabel, f"({bState.totalCount})")
         
-        self.update()
+        # the card is painted in the colour of its affordability
+        if labelCache.changed('canAfford', state.canAffordCost(bCost)):
+            self.update()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -11,6 +11,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSize, QCoreApplication
 from game.database.gameDatabase import GameDatabase
 from game.core.gameState import GameState
 from game.ui.collapsibleMenuWidget import CollapsibleMenuWidget, CollapsibleSectionEntries
+from game.ui.labelCache import LabelCache
 from game.util.enums import GameWindowMode
 from game.util.styleSheets import StyleSheets
 
@@ -21,6 +22,7 @@ class CommandButtonWidget(QPushButton):
         super().__init__()
         self.name = name
         self.gameUI = gameUI
+        self.labelCache = LabelCache()
         self.state = gameUI.state
         self.setFixedWidth(270)
         self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.MinimumExpanding)
@@ -118,8 +120,8 @@ class CommandButtonWidget(QPushButton):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
-        commandCost = self.state.getCommandCost(self.name)
-        canAfford = self.state.canAffordCost(commandCost)
+        commandCost = self.gameUI.state.getCommandCost(self.name)
+        canAfford = self.gameUI.state.canAffordCost(commandCost)
         
         if canAfford:
             if self.underMouse():
@@ -141,16 +143,22 @@ class CommandButtonWidget(QPushButton):
     def updateLabels(self):
         
         state : GameState = self.gameUI.state
-        commandCost : ResourceList = self.state.getCommandCost(self.name)
+        commandCost : ResourceList = state.getCommandCost(self.name)
+        labelCache = self.labelCache
+        count = state.ledger.count
+        resourceIndex = state.ledger.resourceIndex
         for rName, v in commandCost.r.items():
-            rValue = state.resources[rName].count
+            rValue = count[resourceIndex[rName]]
             if rValue < v:
-                self.rNameLabels[rName].setStyleSheet(StyleSheets.BUILDING_RESOURCE_LIST_RED)
-                self.rCostLabels[rName].setStyleSheet(StyleSheets.BUILDING_RESOURCE_LIST_RED)
+                styleSheet = StyleSheets.BUILDING_RESOURCE_LIST_RED
             else:
-                self.rNameLabels[rName].setStyleSheet(StyleSheets.BUILDING_RESOURCE_LIST)
-                self.rCostLabels[rName].setStyleSheet(StyleSheets.BUILDING_RESOURCE_LIST)
-        self.update()
+                styleSheet = StyleSheets.BUILDING_RESOURCE_LIST
+            labelCache.setStyleSheet(self.rNameLabels[rName], styleSheet)
+            labelCache.setStyleSheet(self.rCostLabels[rName], styleSheet)
+        
+        # the card is painted in the colour of its affordability
+        if labelCache.changed('canAfford', state.canAffordCost(commandCost)):
+            self.update()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
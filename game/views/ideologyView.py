@@ -14,6 +14,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSize, QCoreApplication
 from game.database.gameDatabase import BuildingInfo, GameDatabase
 from game.core.gameState import BuildingState, GameState
 from game.ui.collapsibleMenuWidget import CollapsibleMenuWidget, CollapsibleSectionEntries
+from game.ui.labelCache import LabelCache
 
 from game.util.styleSheets import StyleSheets
 
@@ -46,6 +47,7 @@ class IdeologyWidget(QWidget):
         super().__init__()
         self.iName = iName
         self.gameUI = gameUI
+        self.labelCache = LabelCache()
         
         #self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.MinimumExpanding)
         
@@ -144,15 +146,21 @@ class IdeologyWidget(QWidget):
     def updateLabels(self):
         state : GameState = self.gameUI.state
         iState = state.ideologies[self.iName]
-        self.progressBar.setValueAndMaximum(iState.localRankScore, iState.localRankThreshold)
+        labelCache = self.labelCache
+        # the bar shows whole numbers, so fractional score does not change it
+        if labelCache.changed(self.progressBar, (math.floor(iState.localRankScore), math.floor(iState.localRankThreshold))):
+            self.progressBar.setValueAndMaximum(iState.localRankScore, iState.localRankThreshold)
         
         if iState.totalScore > 0.0:
-            self.progressBar.setStyleSheet(StyleSheets.PROGRESS_BAR_GREEN)
+            labelCache.setStyleSheet(self.progressBar, StyleSheets.PROGRESS_BAR_GREEN)
         else:
-            self.progressBar.setStyleSheet(StyleSheets.PROGRESS_BAR_RED)
+            labelCache.setStyleSheet(self.progressBar, StyleSheets.PROGRESS_BAR_RED)
             
-        self.rankLabel.setText(f"Rank: {iState.rank}")
-        self.update()
+        labelCache.setText(self.rankLabel, f"Rank: {iState.rank}")
+        
+        # the card is painted in the colour of the sign of the total score
+        if labelCache.changed('scoreSign', (iState.totalScore > 0) - (iState.totalScore < 0)):
+            self.update()
 
 class IdeologyView():
     def __init__(self, gameUI : GameUI):
@@ -12,6 +12,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSize, QCoreApplication
 from game.database.gameDatabase import BuildingInfo, GameDatabase
 from game.core.gameState import BuildingState, GameState
 from game.ui.collapsibleMenuWidget import CollapsibleMenuWidget, CollapsibleSectionEntries
+from game.ui.labelCache import LabelCache
 from game.util.styleSheets import StyleSheets
 
 class ProjectProgressBar(QProgressBar):
@@ -45,6 +46,7 @@ class ProjectButtonWidget(QPushButton):
         super().__init__()
         self.pName = pName
         self.gameUI = gameUI
+        self.labelCache = LabelCache()
         
         self.setFixedWidth(270)
         self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.MinimumExpanding)
@@ -160,16 +162,17 @@ class ProjectButtonWidget(QPushButton):
         state = self.gameUI.state
         pState = state.projects[self.pName]
         projectCost = state.getProjectCost(self.pName)
-        self.progressBar.setValueAndMaximum(pState.progress, projectCost)
+        labelCache = self.labelCache
+        # the bar shows whole numbers, so fractional progress does not change it
+        if labelCache.changed(self.progressBar, (math.floor(pState.progress), math.floor(projectCost))):
+            self.progressBar.setValueAndMaximum(pState.progress, projectCost)
            
         state : GameState = self.gameUI.state
         pState : ProjectState = state.projects[self.pName]
         
         for rName, rPayment in pState.resourcePayments.items():
             displayNum = round(-rPayment * state.database.params.ticksPerPlayerSecond, 1)
-            self.rPaymentLabels[rName].setText(f"{displayNum}".rstrip('0').rstrip('.') + "/s")
-                
-        self.update()
+            labelCache.setText(self.rPaymentLabels[rName], f"{displayNum}".rstrip('0').rstrip('.') + "/s")
 
     def paintEvent(self, event):
         painter = QPainter(self)
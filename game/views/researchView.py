@@ -13,6 +13,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSize, QCoreApplication
 from game.database.gameDatabase import BuildingInfo, GameDatabase
 from game.core.gameState import BuildingState, GameState
 from game.ui.collapsibleMenuWidget import CollapsibleMenuWidget, CollapsibleSectionEntries
+from game.ui.labelCache import LabelCache
 
 from game.util.styleSheets import StyleSheets
 
@@ -23,6 +24,7 @@ class ResearchButtonWidget(QPushButton):
         super().__init__()
         self.rName = rName
         self.gameUI = gameUI
+        self.labelCache = LabelCache()
         
         self.setFixedWidth(270)
         self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.MinimumExpanding)
@@ -153,16 +155,22 @@ class ResearchButtonWidget(QPushButton):
         rState : ResearchState = state.research[self.rName]
         researchCost : ResourceList = state.getResearchCost(self.rName)
         
+        labelCache = self.labelCache
+        count = state.ledger.count
+        resourceIndex = state.ledger.resourceIndex
+        
         for resourceName, v in researchCost.r.items():
-            rValue = state.resources[resourceName].count
+            rValue = count[resourceIndex[resourceName]]
             if rValue < v:
-                self.resourceNameLabels[resourceName].setStyleSheet(StyleSheets.BUILDING_RESOURCE_LIST_RED)
-                self.resourceValueLabels[resourceName].setStyleSheet(StyleSheets.BUILDING_RESOURCE_LIST_RED)
+                styleSheet = StyleSheets.BUILDING_RESOURCE_LIST_RED
             else:
-                self.resourceNameLabels[resourceName].setStyleSheet(StyleSheets.BUILDING_RESOURCE_LIST)
-                self.resourceValueLabels[resourceName].setStyleSheet(StyleSheets.BUILDING_RESOURCE_LIST)
+                styleSheet = StyleSheets.BUILDING_RESOURCE_LIST
+            labelCache.setStyleSheet(self.resourceNameLabels[resourceName], styleSheet)
+            labelCache.setStyleSheet(self.resourceValueLabels[resourceName], styleSheet)
         
-        self.update()
+        # the card is painted in the colour of its affordability
+        if labelCache.changed('canAfford', state.canAffordCost(researchCost)):
+            self.update()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton: